@@ -1,18 +1,69 @@
 import networkx as nx
 import random
 import math 
+import time
 from itertools import cycle
 import collections
+import multiprocessing
 import matplotlib.pyplot as plt
+import numpy as np
 #import networkx.algorithms.cluster as acluster
 
 # note: written for python 3.6 or above
 
-def erdos_renyl(n, p):
+# compact adjacency used by the fast paths below. indptr has n+1 entries and
+# the neighbors of node i are indices[indptr[i]:indptr[i+1]] (sorted).
+# nodes holds the original node labels, or None when nodes are 0..n-1
+CSRGraph = collections.namedtuple("CSRGraph", ["indptr", "indices", "nodes"])
+
+
+def edges_to_csr(n, edges):
+    """
+    Input:  n - number of nodes
+            edges - int array of shape (m, 2), each undirected edge once
+    Return CSRGraph holding both directions of every edge
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+    # sort by (src, dst) so every neighbor list comes out sorted
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return CSRGraph(indptr, dst[order], None)
+
+
+def graph_to_csr(g):
+    "Return CSRGraph for networkx graph g, nodes relabeled to 0..n-1"
+    nodes = list(g.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.fromiter((index[x] for e in g.edges for x in e),
+                        dtype=np.int64, count=2 * g.number_of_edges())
+    csr = edges_to_csr(len(nodes), edges)
+    if nodes == list(range(len(nodes))):
+        return csr
+    return csr._replace(nodes=nodes)
+
+
+def csr_to_graph(csr):
+    "Return networkx graph with the same nodes and edges as CSRGraph csr"
+    n = len(csr.indptr) - 1
+    src = np.repeat(np.arange(n), np.diff(csr.indptr))
+    mask = src < csr.indices
+    g = nx.Graph()
+    g.add_nodes_from(range(n))
+    g.add_edges_from(zip(src[mask].tolist(), csr.indices[mask].tolist()))
+    if csr.nodes is not None:
+        g = nx.relabel_nodes(g, dict(enumerate(csr.nodes)))
+    return g
+
+
+def erdos_renyl_naive(n, p):
     """
     Input:  n - number of nodes
             p - probability of an edge
     Return random graph by erdos-renyl model with these parameters 
+    Reference implementation, loops over every pair. Use erdos_renyl instead.
     """
     # first create a graph of the correct size:
     g = nx.Graph()
@@ -25,12 +76,76 @@ def erdos_renyl(n, p):
                 g.add_edge(i,j)
     return g
 
-def small_world(n, k, p):
+
+def erdos_renyl_edges(n, p, seed=None, chunk_size=1 << 20):
+    """
+    Input:  n - number of nodes
+            p - probability of an edge
+            seed - seed (or numpy Generator) for reproducible output
+            chunk_size - number of candidate edges drawn per batch
+    Yield int64 arrays of shape (<=chunk_size, 2) holding the edges (v, w), w < v.
+    Uses geometric skip sampling: instead of flipping a coin for every pair we
+    draw the gap to the next chosen pair, so the work is O(n + m) expected.
+    The same seed and chunk_size always give the same edges.
+    """
+    rng = np.random.default_rng(seed)
+    total = n * (n - 1) // 2
+    if total == 0 or p <= 0:
+        return
+    # pairs are numbered in lower triangle order: (v, w) -> v*(v-1)/2 + w
+    last = -1
+    while True:
+        if p >= 1:
+            idx = np.arange(last + 1, min(last + 1 + chunk_size, total), dtype=np.int64)
+        else:
+            # enough draws to pass the end of the triangle in one batch most of
+            # the time, so small graphs don't pay for a full chunk
+            remaining = (total - 1 - last) * p
+            size = min(chunk_size, int(remaining + 4 * np.sqrt(remaining)) + 16)
+            idx = last + np.cumsum(rng.geometric(p, size=size), dtype=np.int64)
+            idx = idx[idx < total]
+        if len(idx) == 0:
+            return
+        last = int(idx[-1])
+        v = ((1 + np.sqrt(1 + 8 * idx.astype(np.float64))) // 2).astype(np.int64)
+        # fix float rounding so that v*(v-1)/2 <= idx < v*(v+1)/2
+        v -= v * (v - 1) // 2 > idx
+        v += v * (v + 1) // 2 <= idx
+        w = idx - v * (v - 1) // 2
+        yield np.column_stack((v, w))
+        if last >= total - 1 or len(idx) < (chunk_size if p >= 1 else size):
+            return
+
+
+def erdos_renyl(n, p, seed=None, output="graph", chunk_size=1 << 20):
+    """
+    Input:  n - number of nodes
+            p - probability of an edge
+            seed - seed (or numpy Generator) for reproducible output
+            output - "graph" for nx.Graph, "csr" for CSRGraph,
+                     "edges" for an (m, 2) int64 edge array
+    Return random graph by erdos-renyl model with these parameters 
+    """
+    chunks = list(erdos_renyl_edges(n, p, seed, chunk_size))
+    edges = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+    if output == "edges":
+        return edges
+    if output == "csr":
+        return edges_to_csr(n, edges)
+    if output != "graph":
+        raise ValueError(f"unknown output format: {output}")
+    g = nx.Graph()
+    g.add_nodes_from(range(n))
+    g.add_edges_from(edges.tolist())
+    return g
+
+def small_world_naive(n, k, p):
     """
     Input:  n - number of nodes
             k - average degree
             p - probability for edge
     Return random graph using small world model
+    Reference implementation on nx.Graph. Use small_world instead.
     """
     # step1 create the graph will k-neighbor nodes
     g = nx.Graph()
@@ -51,6 +166,102 @@ def small_world(n, k, p):
     return g
 
 
+def small_world_edges(n, k, p, seed=None):
+    """
+    Input:  n - number of nodes
+            k - average degree
+            p - probability for edge
+            seed - seed (or numpy Generator) for reproducible output
+    Return (m, 2) int64 edge array of a small world graph.
+    The ring lattice is never stored: an edge (u, v) exists if it is a lattice
+    edge that was not rewired, or if it was added by a rewire. Only the rewired
+    edges live in hash sets, so the cost is O(n*k) numpy work plus O(n*k*p)
+    python steps. New endpoints are picked by rejection sampling.
+    """
+    rng = np.random.default_rng(seed)
+    nbrs = k // 2
+    if n <= 2 * nbrs:
+        raise ValueError(f"k={k} is too large for n={n}")
+    # lattice edge (i, i+j) is number i*nbrs + j-1
+    src = np.repeat(np.arange(n, dtype=np.int64), nbrs)
+    dst = (src + np.tile(np.arange(1, nbrs + 1, dtype=np.int64), n)) % n
+    rewire = np.flatnonzero(rng.random(n * nbrs) < p)
+
+    removed = set()
+    added = set()
+
+    def has_edge(a, b):
+        key = min(a, b) * n + max(a, b)
+        d = abs(a - b)
+        return (0 < min(d, n - d) <= nbrs and key not in removed) or key in added
+
+    candidates = rng.integers(0, n, size=max(2 * len(rewire), 16)).tolist()
+    pos = 0
+    for e in rewire.tolist():
+        i, old = int(src[e]), int(dst[e])
+        removed.add(min(i, old) * n + max(i, old))
+        while True:
+            if pos == len(candidates):
+                candidates = rng.integers(0, n, size=len(candidates)).tolist()
+                pos = 0
+            w = candidates[pos]
+            pos += 1
+            if w != i and not has_edge(i, w):
+                break
+        added.add(min(i, w) * n + max(i, w))
+
+    lo = np.minimum(src, dst)
+    keys = lo * n + np.maximum(src, dst)
+    if removed:
+        keys = keys[~np.isin(keys, np.fromiter(removed, dtype=np.int64))]
+    if added:
+        keys = np.concatenate((keys, np.fromiter(added, dtype=np.int64)))
+    return np.column_stack((keys // n, keys % n))
+
+
+def small_world(n, k, p, seed=None, output="graph"):
+    """
+    Input:  n - number of nodes
+            k - average degree
+            p - probability for edge
+            seed - seed (or numpy Generator) for reproducible output
+            output - "graph", "csr" or "edges", as in erdos_renyl
+    Return random graph using small world model
+    """
+    edges = small_world_edges(n, k, p, seed)
+    if output == "edges":
+        return edges
+    if output == "csr":
+        return edges_to_csr(n, edges)
+    if output != "graph":
+        raise ValueError(f"unknown output format: {output}")
+    g = nx.Graph()
+    g.add_nodes_from(range(n))
+    g.add_edges_from(edges.tolist())
+    return g
+
+
+def _small_world_replica(args):
+    return small_world(*args)
+
+
+def small_world_replicas(n, k, p, count, seed=None, output="csr", processes=None):
+    """
+    Input:  n, k, p - small world parameters
+            count - number of graphs to generate
+            seed - master seed, every replica gets its own child seed
+            output - format of each replica, as in small_world
+            processes - size of the process pool, None to run serially
+    Return list of count independent small world graphs
+    """
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    jobs = [(n, k, p, np.random.default_rng(s), output) for s in seeds]
+    if processes is None:
+        return [_small_world_replica(job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_small_world_replica, jobs)
+
+
 def get_non_neighbors(g, i):
     """
     Return all edges in graph g not connected to node i. 
@@ -58,21 +269,130 @@ def get_non_neighbors(g, i):
     """
     return set(g.nodes) - set(g.neighbors(i)) - set([i])
 
-def graph_cluster_coeff(g):
-    "Compute and return clastering coefficient for graph g"
-    sum = 0
-    for node in g.nodes:
-        sum += node_cluster_coeff(g, node)
+def orient_by_degree(csr):
+    """
+    Relabel the nodes of csr by (degree, id) rank and keep every edge only in
+    the direction low rank -> high rank.
+    Return (indptr, indices, keys, order): the oriented CSR in rank space, the
+    sorted edge keys u*n+v of it and order[rank] = original node.
+    """
+    n = len(csr.indptr) - 1
+    deg = np.diff(csr.indptr)
+    order = np.lexsort((np.arange(n), deg))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    src = rank[np.repeat(np.arange(n), deg)]
+    dst = rank[csr.indices]
+    mask = src < dst
+    keys = np.sort(src[mask] * n + dst[mask])
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+    return indptr, keys % n, keys, order
+
+
+def _count_triangles(indptr, indices, keys, lo, hi, max_wedges=1 << 22):
+    """
+    Count triangles whose lowest ranked node is in [lo, hi).
+    Every such triangle (u, v, w) is the wedge v <- u -> w closed by the
+    oriented edge v -> w, so it is seen exactly once.
+    Return per node (rank space) triangle counts.
+    """
+    n = len(indptr) - 1
+    tri = np.zeros(n, dtype=np.int64)
+    outdeg = np.diff(indptr)
+    wedges = np.cumsum(outdeg[lo:hi] * (outdeg[lo:hi] - 1) // 2)
+    start = lo
+    while start < hi:
+        # process as many nodes as fit in the wedge budget, at least one
+        done = wedges[start - lo - 1] if start > lo else 0
+        stop = lo + int(np.searchsorted(wedges, done + max_wedges, side="right"))
+        stop = min(max(stop, start + 1), hi)
+        pos = np.arange(indptr[start], indptr[stop])
+        owner = np.repeat(np.arange(start, stop), outdeg[start:stop])
+        cnt = indptr[owner + 1] - pos - 1
+        total = int(cnt.sum())
+        start = stop
+        if total == 0:
+            continue
+        first = np.repeat(pos, cnt)
+        second = first + 1 + np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        v = indices[first]
+        w = indices[second]
+        query = v * n + w
+        found = keys[np.minimum(np.searchsorted(keys, query), len(keys) - 1)] == query
+        tri += np.bincount(np.repeat(owner, cnt)[found], minlength=n)
+        tri += np.bincount(v[found], minlength=n)
+        tri += np.bincount(w[found], minlength=n)
+    return tri
+
 
-    return sum / g.number_of_nodes()
+_triangle_worker_data = None
+
+
+def _init_triangle_worker(indptr, indices, keys):
+    global _triangle_worker_data
+    _triangle_worker_data = (indptr, indices, keys)
+
+
+def _triangle_worker(bounds):
+    return _count_triangles(*_triangle_worker_data, *bounds)
+
+
+def triangle_counts(csr, processes=None):
+    """
+    Input:  csr - CSRGraph
+            processes - size of the process pool, None to run serially
+    Return int64 array with the number of triangles through every node,
+    using the forward (degree ordered) algorithm.
+    """
+    n = len(csr.indptr) - 1
+    indptr, indices, keys, order = orient_by_degree(csr)
+    if len(keys) == 0:
+        return np.zeros(n, dtype=np.int64)
+    if processes is None:
+        tri = _count_triangles(indptr, indices, keys, 0, n)
+    else:
+        # shard the rank space so every worker gets about the same wedge count
+        outdeg = np.diff(indptr)
+        wedges = np.cumsum(outdeg * (outdeg - 1) // 2)
+        cuts = np.searchsorted(wedges, np.linspace(0, wedges[-1], processes + 1)[1:-1])
+        bounds = list(zip([0, *cuts.tolist()], [*cuts.tolist(), n]))
+        with multiprocessing.Pool(processes, _init_triangle_worker, (indptr, indices, keys)) as pool:
+            tri = sum(pool.map(_triangle_worker, bounds))
+    res = np.empty(n, dtype=np.int64)
+    res[order] = tri
+    return res
+
+
+def clustering(g, processes=None):
+    """
+    Input:  g - nx.Graph or CSRGraph
+            processes - size of the process pool, None to run serially
+    Return (local, average): local clustering coefficient of every node (0 for
+    nodes with degree < 2, in g.nodes order) and their average.
+    """
+    csr = g if isinstance(g, CSRGraph) else graph_to_csr(g)
+    deg = np.diff(csr.indptr)
+    tri = triangle_counts(csr, processes)
+    max_links = deg * (deg - 1)
+    local = np.zeros(len(deg))
+    np.divide(2 * tri, max_links, out=local, where=max_links > 0)
+    return local, (local.mean() if len(local) else 0.0)
+
+
+def graph_cluster_coeff(g, processes=None):
+    "Compute and return clastering coefficient for graph g (nx.Graph or CSRGraph)"
+    return clustering(g, processes)[1]
 
 
 def node_cluster_coeff(g, i):
     "Return clustering coefficient for node i"
     neighbors = set(g.neighbors(i))
+    if len(neighbors) < 2:
+        return 0
     count = 0
     for neighbor in neighbors:
-        count += len(set(g.neighbors(neighbor)).intersection(neighbors))
+        count += len(neighbors.intersection(g[neighbor]))
 
     # we counter every edge twice:
     count /= 2
@@ -82,6 +402,209 @@ def node_cluster_coeff(g, i):
     #assert math.isclose(acluster.clustering(g, i), res)
     return res
 
+def bfs_distances(csr, source):
+    """
+    Level synchronous BFS over CSRGraph csr.
+    Return int64 array of hop distances from source, -1 for unreachable nodes.
+    """
+    n = len(csr.indptr) - 1
+    dist = np.full(n, -1, dtype=np.int64)
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    while len(frontier):
+        starts = csr.indptr[frontier]
+        cnt = csr.indptr[frontier + 1] - starts
+        total = int(cnt.sum())
+        if total == 0:
+            break
+        # gather all neighbor slices of the frontier in one shot
+        offsets = np.repeat(starts - np.cumsum(cnt) + cnt, cnt) + np.arange(total)
+        nbrs = csr.indices[offsets]
+        nbrs = nbrs[dist[nbrs] == -1]
+        # dedup without sorting: keep the copy whose tag survived the write
+        tag = -2 - np.arange(len(nbrs))
+        dist[nbrs] = tag
+        frontier = nbrs[dist[nbrs] == tag]
+        level += 1
+        dist[frontier] = level
+    return dist
+
+
+def component_labels(csr):
+    """
+    Label connected components by hooking and pointer jumping over the edge
+    arrays (no python loop per node or per component).
+    Return (labels, sizes): labels[v] in 0..c-1, sizes[c] = nodes in component c.
+    """
+    n = len(csr.indptr) - 1
+    src = np.repeat(np.arange(n), np.diff(csr.indptr))
+    dst = csr.indices
+    mask = src < dst
+    src, dst = src[mask], dst[mask]
+    lab = np.arange(n)
+    while True:
+        ls, ld = lab[src], lab[dst]
+        if np.array_equal(ls, ld):
+            break
+        # hook the larger root under the smaller one, then flatten the trees
+        np.minimum.at(lab, np.maximum(ls, ld), np.minimum(ls, ld))
+        while True:
+            nxt = lab[lab]
+            if np.array_equal(nxt, lab):
+                break
+            lab = nxt
+    _, labels = np.unique(lab, return_inverse=True)
+    return labels, np.bincount(labels)
+
+
+def subgraph_csr(csr, nodes, local=None):
+    """
+    Input:  csr - CSRGraph
+            nodes - sorted int array of node ids, closed under neighborhood
+                    (e.g. a whole connected component)
+            local - optional int64 scratch array of size n, reused between calls
+    Return CSRGraph of the induced subgraph relabeled to 0..len(nodes)-1,
+    with nodes holding the original ids. Costs O(size of the subgraph).
+    """
+    if local is None:
+        local = np.empty(len(csr.indptr) - 1, dtype=np.int64)
+    local[nodes] = np.arange(len(nodes))
+    starts = csr.indptr[nodes]
+    cnt = csr.indptr[nodes + 1] - starts
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(cnt, out=indptr[1:])
+    offsets = np.repeat(starts - indptr[:-1], cnt) + np.arange(indptr[-1])
+    # nodes are sorted so the relabeling keeps neighbor lists sorted
+    return CSRGraph(indptr, local[csr.indices[offsets]], nodes)
+
+
+def largest_component(csr):
+    """
+    Return CSRGraph of the largest connected component of csr, relabeled to
+    0..size-1 (nodes holds the original ids). Only that component is copied.
+    """
+    labels, sizes = component_labels(csr)
+    if len(sizes) <= 1:
+        return csr
+    return subgraph_csr(csr, np.flatnonzero(labels == np.argmax(sizes)))
+
+
+def _deadline(time_budget):
+    return None if time_budget is None else time.perf_counter() + time_budget
+
+
+def _expired(deadline):
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def double_sweep(csr, start):
+    """
+    BFS from start to the farthest node a, then BFS from a to the farthest b.
+    Return (lower, upper, middle): bounds on the diameter of the component of
+    start and a node in the middle of the a-b path (a good iFUB root).
+    """
+    dist = bfs_distances(csr, start)
+    a = int(np.argmax(dist))
+    dist_a = bfs_distances(csr, a)
+    b = int(np.argmax(dist_a))
+    lower = int(dist_a[b])
+    dist_b = bfs_distances(csr, b)
+    on_path = np.flatnonzero((dist_a + dist_b == lower) & (dist_a == lower // 2))
+    return lower, 2 * int(dist.max()), int(on_path[0])
+
+
+def ifub_diameter(csr, start=None, time_budget=None):
+    """
+    Input:  csr - CSRGraph
+            start - any node of the component, default is the max degree node
+            time_budget - seconds to spend, None for no limit
+    Return (lower, upper) bounds on the diameter of the component of start,
+    using the iFUB algorithm. lower == upper means the value is exact, which is
+    always the case without a time budget.
+    """
+    deadline = _deadline(time_budget)
+    if start is None:
+        start = int(np.argmax(np.diff(csr.indptr)))
+    lower, upper, root = double_sweep(csr, start)
+    dist = bfs_distances(csr, root)
+    ecc = int(dist.max())
+    lower = max(lower, ecc)
+    upper = min(upper, 2 * ecc)
+    # nodes far from root are the only ones that can have a large eccentricity
+    order = np.argsort(-dist, kind="stable")
+    level_start = np.searchsorted(-dist[order], np.arange(-ecc, 1))
+    for i in range(ecc, 0, -1):
+        if lower >= upper or _expired(deadline):
+            break
+        for x in order[level_start[ecc - i]:level_start[ecc - i + 1]].tolist():
+            lower = max(lower, int(bfs_distances(csr, x).max()))
+            if lower > 2 * (i - 1) or _expired(deadline):
+                break
+        if lower > 2 * (i - 1):
+            upper = lower
+        elif not _expired(deadline):
+            upper = min(upper, 2 * (i - 1))
+    return lower, max(lower, upper)
+
+
+def component_diameters(csr, time_budget=None):
+    """
+    Input:  csr - CSRGraph
+            time_budget - seconds to spend on all components, None for no limit
+    Return (labels, lower, upper): component labels as in component_labels and
+    per component diameter bounds. When the budget runs out the remaining
+    components only get double sweep bounds.
+    """
+    deadline = _deadline(time_budget)
+    labels, sizes = component_labels(csr)
+    lower = np.minimum(sizes - 1, 1)
+    upper = lower.copy()
+    # run every component on its own compact CSR so a BFS costs O(component)
+    by_label = np.argsort(labels, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(sizes)))
+    local = np.empty(len(labels), dtype=np.int64)
+    for c in np.flatnonzero(sizes > 2).tolist():
+        sub = subgraph_csr(csr, by_label[bounds[c]:bounds[c + 1]], local)
+        if _expired(deadline):
+            lower[c], upper[c], _ = double_sweep(sub, 0)
+        else:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            lower[c], upper[c] = ifub_diameter(sub, None, remaining)
+    return labels, lower, upper
+
+
+def effective_diameter(csr, samples=100, q=0.9, seed=None, time_budget=None):
+    """
+    Input:  csr - CSRGraph
+            samples - number of random BFS sources
+            q - fraction of connected pairs, 0.9 gives the usual effective diameter
+            seed - seed (or numpy Generator) for picking the sources
+            time_budget - seconds to spend, at least one source is always used
+    Return the (interpolated) distance within which a fraction q of the
+    reachable node pairs lie, estimated from the sampled sources.
+    """
+    deadline = _deadline(time_budget)
+    rng = np.random.default_rng(seed)
+    n = len(csr.indptr) - 1
+    hist = np.zeros(1, dtype=np.int64)
+    for source in rng.choice(n, size=min(samples, n), replace=False).tolist():
+        dist = bfs_distances(csr, source)
+        counts = np.bincount(dist[dist > 0])
+        if len(counts) > len(hist):
+            hist = np.concatenate((hist, np.zeros(len(counts) - len(hist), dtype=np.int64)))
+        hist[:len(counts)] += counts
+        if _expired(deadline):
+            break
+    if hist.sum() == 0:
+        return 0.0
+    cdf = np.cumsum(hist) / hist.sum()
+    d = int(np.searchsorted(cdf, q))
+    if d == 0 or cdf[d] == cdf[d - 1]:
+        return float(d)
+    return d - 1 + (q - cdf[d - 1]) / (cdf[d] - cdf[d - 1])
+
+
 def mytests():
     for n in [100, 1000, 2000]:
         p = 0.2
@@ -94,47 +617,102 @@ def mytests():
         g = small_world(n,k,p)
         print(f"Small world clustering coefficient:{graph_cluster_coeff(g)}")
 
-# Histogram code taken from:
+def degree_array(g):
+    "Return int64 degree of every node of g (nx.Graph or CSRGraph)"
+    if isinstance(g, CSRGraph):
+        return np.diff(g.indptr)
+    return np.fromiter((d for _, d in g.degree()), dtype=np.int64, count=g.number_of_nodes())
+
+
+def log_binned(counts, bins_per_decade=10):
+    """
+    Input:  counts - counts[d] is the number of nodes with degree d
+            bins_per_decade - resolution of the logarithmic bins
+    Return (edges, binned, density) for degrees >= 1: bin i holds the degrees
+    edges[i] <= d < edges[i+1], density is binned divided by the bin width.
+    """
+    top = max(len(counts), 2)
+    edges = np.unique(np.floor(np.logspace(
+        0, np.log10(top), int(np.ceil(np.log10(top) * bins_per_decade)) + 1)).astype(np.int64))
+    edges[-1] = top
+    padded = np.zeros(top, dtype=np.int64)
+    padded[:len(counts)] = counts
+    binned = np.add.reduceat(padded, edges[:-1])
+    return edges, binned, binned / np.diff(edges)
+
+
+class DegreeHistogram:
+    """
+    Degree counts accumulated over one or more graphs (e.g. generated
+    replicas), without keeping the graphs or their degree sequences around.
+    """
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.graphs = 0
+
+    def add(self, g):
+        "Add the degrees of g (nx.Graph or CSRGraph) to the histogram"
+        counts = np.bincount(degree_array(g))
+        if len(counts) > len(self.counts):
+            self.counts = np.append(self.counts, np.zeros(len(counts) - len(self.counts), dtype=np.int64))
+        self.counts[:len(counts)] += counts
+        self.graphs += 1
+        return self
+
+    def to_csv(self, fname, log_bins=False):
+        "Write degree,count rows (or bin_start,bin_end,count,density for log bins)"
+        if log_bins:
+            edges, binned, density = log_binned(self.counts)
+            rows = np.column_stack((edges[:-1], edges[1:], binned, density))
+            np.savetxt(fname, rows, fmt=["%d", "%d", "%d", "%.6g"], delimiter=",",
+                       header="bin_start,bin_end,count,density", comments="")
+        else:
+            deg = np.flatnonzero(self.counts)
+            np.savetxt(fname, np.column_stack((deg, self.counts[deg])), fmt="%d", delimiter=",",
+                       header="degree,count", comments="")
+
+    def save_png(self, name, fname=None, log_bins=False):
+        "Plot the histogram (averaged over the added graphs) to fname"
+        fig, ax = plt.subplots()
+        if log_bins:
+            edges, _, density = log_binned(self.counts)
+            ax.loglog(np.sqrt(edges[:-1] * edges[1:]), density / self.graphs, 'o', color='b')
+        else:
+            deg = np.flatnonzero(self.counts)
+            ax.bar(deg, self.counts[deg] / self.graphs, width=0.80, color='b')
+        ax.set_title(f"Degree Histogram for {name}")
+        ax.set_ylabel("Count")
+        ax.set_xlabel("Degree")
+        fig.savefig(fname or f'{name}_histogram.png', dpi=fig.dpi)
+        plt.close(fig)
+
+
+# Histogram code based on:
 # https://networkx.github.io/documentation/stable/auto_examples/drawing/plot_degree_histogram.html
-def show_degree_histogram(name, g, save=True):
-    degree_sequence = sorted([d for n, d in g.degree()], reverse=True)  # degree sequence
-    # print "Degree sequence", degree_sequence
-    degreeCount = collections.Counter(degree_sequence)
-    deg, cnt = zip(*degreeCount.items())
-
-    fig, ax = plt.subplots()
-    plt.bar(deg, cnt, width=0.80, color='b')
-
-    plt.title(f"Degree Histogram for {name}")
-    plt.ylabel("Count")
-    plt.xlabel("Degree")
-    # ax.set_xticks([d + 0.4 for d in deg])
-    # ax.set_xticklabels(deg)
-
-    # draw graph in inset
-    plt.axes([0.4, 0.4, 0.5, 0.5])
-    Gcc = sorted(nx.connected_component_subgraphs(g), key=len, reverse=True)[0]
-    pos = nx.spring_layout(g)
-    plt.axis('off')
-    #nx.draw_networkx_nodes(g, pos, node_size=20)
-    #nx.draw_networkx_edges(g, pos, alpha=0.4)
-
-    # plt.show()
+def show_degree_histogram(name, g, save=True, log_bins=False):
+    "Compute the degree histogram of g and save it as {name}_histogram.png/.csv"
+    hist = DegreeHistogram().add(g)
     if save:
-        fig.savefig(f'{name}_histogram.png', dpi=fig.dpi)
+        hist.save_png(name, log_bins=log_bins)
+        hist.to_csv(f'{name}_histogram.csv', log_bins=log_bins)
+    return hist
 
 
 def analyze(name, g):
+    csr = graph_to_csr(g)
     print("Calculating coefficient...")
-    cluster_coeff = graph_cluster_coeff(g)
+    cluster_coeff = graph_cluster_coeff(csr)
     print("Calculating diameter...")
-    try:
-        diam = nx.diameter(g)
-    except nx.NetworkXError as e:
+    labels, lower, upper = component_diameters(csr)
+    if len(lower) == 1:
+        diam = lower[0]
+    else:
         diam = "Infinite"
+        print(f"{len(lower)} components, largest component diameter={lower[np.argmax(np.bincount(labels))]}")
+    print(f"Effective diameter (90%, sampled):{effective_diameter(csr, seed=0)}")
     print(f"{name} cluster coeff:{cluster_coeff}, diameter={diam}")
     print("Saving plot...")
-    show_degree_histogram(name, g)
+    show_degree_histogram(name, csr)
 
 
 
@@ -1,54 +1,386 @@
-import networkx as nx
 import numpy as np
+import multiprocessing
+import heapq
+from collections import deque, namedtuple
+
+# compact adjacency: neighbors of node i are indices[indptr[i]:indptr[i+1]],
+# nodes[i] is the original label of node i
+CsrGraph = namedtuple("CsrGraph", ["indptr", "indices", "nodes"])
+
+
+def graphToCsr(graph):
+    if isinstance(graph, CsrGraph):
+        return graph
+    nodes = list(graph.nodes())
+    index = {v: i for i, v in enumerate(nodes)}
+    edges = np.fromiter((index[x] for e in graph.edges() for x in e), dtype=np.int64,
+                        count=2 * graph.number_of_edges()).reshape(-1, 2)
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+    return CsrGraph(indptr, dst[order], nodes)
+
+
+def _expand(csr, frontier):
+    # adjacency positions of all edges leaving the nodes of frontier, and the count per node
+    starts = csr.indptr[frontier]
+    cnt = csr.indptr[frontier + 1] - starts
+    return np.repeat(starts - np.cumsum(cnt) + cnt, cnt) + np.arange(cnt.sum()), cnt
+
+
+def bfsDistances(csr, source):
+    """
+    BFS from node index source, one frontier array per level.
+    Returns int64 vector of distances, -1 for unreachable nodes.
+    """
+    dist = np.full(len(csr.indptr) - 1, -1, dtype=np.int64)
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    while len(frontier):
+        nbrs = csr.indices[_expand(csr, frontier)[0]]
+        nbrs = nbrs[dist[nbrs] == -1]
+        # drop duplicates: keep whichever write of each node survived
+        tag = -2 - np.arange(len(nbrs))
+        dist[nbrs] = tag
+        frontier = nbrs[dist[nbrs] == tag]
+        level += 1
+        dist[frontier] = level
+    return dist
+
+
+def _closenessSums(csr, sources):
+    # (reachable nodes, sum of distances) for every source
+    res = np.zeros((len(sources), 2), dtype=np.int64)
+    for i, source in enumerate(sources):
+        dist = bfsDistances(csr, source)
+        reached = dist[dist > 0]
+        res[i] = len(reached), reached.sum()
+    return res
+
+
+_workerCsr = None
 
-def closenessCentrality(graph, node=None):
-    nodes = graph.nodes()
-    result = {}
-    numberOfNodes = len(graph)
-    
-    for vertex in nodes:
-        distanceMap = calculateDistance(graph, vertex)     
-        result[vertex] = (numberOfNodes - 1) *pow(sum(distanceMap.values()),-1) #from lecture
-    return result
+
+def _initWorker(csr):
+    global _workerCsr
+    _workerCsr = csr
+
+
+def _closenessWorker(sources):
+    return _closenessSums(_workerCsr, sources)
+
+
+def closenessScores(csr, sources=None, processes=None):
+    """
+    Closeness of the given source indices (default all nodes) as a numpy vector.
+    Uses the Wasserman-Faust normalization, so on a disconnected graph a node
+    is scored within its component, scaled by the fraction of nodes it reaches.
+    """
+    n = len(csr.indptr) - 1
+    if sources is None:
+        sources = np.arange(n)
+    if processes is None:
+        sums = _closenessSums(csr, sources)
+    else:
+        chunks = np.array_split(sources, processes * 4)
+        with multiprocessing.Pool(processes, _initWorker, (csr,)) as pool:
+            sums = np.concatenate(pool.map(_closenessWorker, chunks))
+    reach, total = sums[:, 0], sums[:, 1]
+    res = np.zeros(len(sources))
+    if n > 1:
+        np.divide(reach * reach, total * (n - 1.0), out=res, where=total > 0)  # (r/sum)*(r/(n-1))
+    return res
+
+
+def closenessCentrality(graph, node=None, processes=None):
+    csr = graphToCsr(graph)
+    if node is not None:
+        return closenessScores(csr, [csr.nodes.index(node)])[0]
+    scores = closenessScores(csr, processes=processes)
+    # on a connected graph this is (n-1)/sum of distances, as in the lecture
+    return dict(zip(csr.nodes, scores.tolist()))
 
 
 
 def degreeCentrality(graph):   
-    nodes = graph.nodes()
-    result = {}
     numberOfNodes = len(graph)
-
-    for vertex in nodes:
-        result[vertex] = len(list(graph.neighbors(vertex))) / (numberOfNodes - 1)#from lecture
+    result = {}
+    for vertex, degree in graph.degree():
+        result[vertex] = degree / (numberOfNodes - 1)#from lecture
     return result
 
 
-def betweennessCentrality(graph):
-    nodes = graph.nodes()
-    numberOfNodes = len(graph)
-    keys = nodes
-    values = [0 for vertex in range(numberOfNodes)]
-    result = dict(zip(keys,values))#create dic node and val
-    
-    for srcVertex in nodes:
-        for dstVertex in nodes:
-            if srcVertex < dstVertex:
-                paths = [pth for pth in nx.all_shortest_paths(graph, source=srcVertex, target=dstVertex)]
-                for pth in paths:
-                    for p_i in pth[1:-1]:
-                        if p_i in result:#check if p_i on the shortest path
-                            result[p_i] += 1 / len(paths)#update table
-    for res in result:
-        result[res] = (2*result[res])/((numberOfNodes - 1) * (numberOfNodes - 2))#from lecture
+def _brandesDependencies(csr, source, dist, sigma, delta):
+    """
+    One Brandes pass from source. dist, sigma and delta are scratch vectors
+    (dist must be all -1), they are reset before returning.
+    Returns the touched nodes, their dependency on source and the farness
+    (sum of distances) of source, so closeness comes from the same BFS.
+    """
+    dist[source] = 0
+    sigma[source] = 1
+    frontier = np.array([source], dtype=np.int64)
+    visited = [frontier]
+    levelEdges = []
+    level = 0
+    while len(frontier):
+        pos, cnt = _expand(csr, frontier)
+        nbrs = csr.indices[pos]
+        preds = np.repeat(frontier, cnt)
+        new = nbrs[dist[nbrs] == -1]
+        dist[new] = level + 1
+        # edges into the next level are the shortest path dag edges
+        onDag = dist[nbrs] == level + 1
+        preds, nbrs = preds[onDag], nbrs[onDag]
+        np.add.at(sigma, nbrs, sigma[preds])
+        levelEdges.append((preds, nbrs))
+        frontier = np.unique(new)
+        visited.append(frontier)
+        level += 1
+    for preds, nbrs in reversed(levelEdges):
+        np.add.at(delta, preds, sigma[preds] / sigma[nbrs] * (1 + delta[nbrs]))
+    touched = np.concatenate(visited)
+    res = delta[touched].copy()
+    res[0] = 0  # the source itself
+    farness = int(dist[touched].sum())
+    dist[touched] = -1
+    sigma[touched] = 0
+    delta[touched] = 0
+    return touched, res, farness
+
+
+def _betweennessSums(csr, sources):
+    n = len(csr.indptr) - 1
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n)
+    delta = np.zeros(n)
+    total = np.zeros(n)
+    for source in sources:
+        touched, dep, _ = _brandesDependencies(csr, source, dist, sigma, delta)
+        total[touched] += dep
+    return total
 
+
+def _betweennessWorker(sources):
+    return _betweennessSums(_workerCsr, sources)
+
+
+def betweennessScores(csr, sources=None, processes=None):
+    """
+    Brandes betweenness, O(nm). Returns the sum over sources of the dependency
+    of every node (numpy vector, not normalized). With processes the sources
+    are split over a pool and the partial vectors are summed.
+    """
+    n = len(csr.indptr) - 1
+    if sources is None:
+        sources = np.arange(n)
+    if processes is None:
+        return _betweennessSums(csr, sources)
+    chunks = np.array_split(sources, processes * 4)
+    with multiprocessing.Pool(processes, _initWorker, (csr,)) as pool:
+        return sum(pool.map(_betweennessWorker, chunks))
+
+
+def betweennessCentrality(graph, processes=None):
+    csr = graphToCsr(graph)
+    numberOfNodes = len(csr.nodes)
+    if numberOfNodes < 3:
+        return dict.fromkeys(csr.nodes, 0.0)
+    # every pair is counted from both ends, so this is 2*b/((n-1)(n-2)) from lecture
+    scores = betweennessScores(csr, processes=processes) / ((numberOfNodes - 1) * (numberOfNodes - 2))
+    return dict(zip(csr.nodes, scores.tolist()))
+
+
+def approximateBetweenness(graph, k, seed=None, confidence=0.9, processes=None):
+    """
+    Brandes from k random pivots, scaled by n/k.
+    Returns (scores dict, error): with probability confidence every normalized
+    score is within error of the exact one (Hoeffding + union bound).
+    """
+    if k < 1:
+        raise ValueError(f"need at least one pivot, got k={k}")
+    csr = graphToCsr(graph)
+    numberOfNodes = len(csr.nodes)
+    if numberOfNodes < 3:
+        return dict.fromkeys(csr.nodes, 0.0), 0.0
+    k = min(k, numberOfNodes)
+    pivots = np.random.default_rng(seed).choice(numberOfNodes, size=k, replace=False)
+    sums = betweennessScores(csr, pivots, processes)
+    scores = sums * numberOfNodes / k / ((numberOfNodes - 1) * (numberOfNodes - 2))
+    error = 0.0
+    if k < numberOfNodes:
+        error = numberOfNodes / (numberOfNodes - 1) * np.sqrt(np.log(2 * numberOfNodes / (1 - confidence)) / (2 * k))
+    return dict(zip(csr.nodes, scores.tolist())), error
+
+def _centralitySums(csr, sources):
+    # betweenness totals plus (reach, farness) of every source, one BFS each
+    n = len(csr.indptr) - 1
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n)
+    delta = np.zeros(n)
+    total = np.zeros(n)
+    closeness = np.zeros((len(sources), 2), dtype=np.int64)
+    for i, source in enumerate(sources):
+        touched, dep, farness = _brandesDependencies(csr, source, dist, sigma, delta)
+        total[touched] += dep
+        closeness[i] = len(touched) - 1, farness
+    return total, closeness
+
+
+def _centralityWorker(sources):
+    return _centralitySums(_workerCsr, sources)
+
+
+def centralityTable(graph, processes=None):
+    """
+    Degree, closeness and betweenness of every node from a single BFS per
+    source, as a numpy structured array with fields node, degree, closeness
+    and betweenness (pandas.DataFrame(table) gives a data frame).
+    Normalizations match degreeCentrality, closenessCentrality and
+    betweennessCentrality.
+    """
+    csr = graphToCsr(graph)
+    n = len(csr.nodes)
+    sources = np.arange(n)
+    if processes is None:
+        total, sums = _centralitySums(csr, sources)
+    else:
+        chunks = np.array_split(sources, processes * 4)
+        with multiprocessing.Pool(processes, _initWorker, (csr,)) as pool:
+            parts = pool.map(_centralityWorker, chunks)
+        total = sum(part[0] for part in parts)
+        sums = np.concatenate([part[1] for part in parts])
+    table = np.zeros(n, dtype=[("node", object), ("degree", float), ("closeness", float), ("betweenness", float)])
+    table["node"] = csr.nodes
+    if n < 2:
+        return table
+    table["degree"] = np.diff(csr.indptr) / (n - 1)
+    reach, farness = sums[:, 0], sums[:, 1]
+    np.divide(reach * reach, farness * (n - 1.0), out=table["closeness"], where=farness > 0)
+    if n > 2:
+        table["betweenness"] = total / ((n - 1) * (n - 2))
+    return table
+
+
+def topKFromScores(nodes, scores, k):
+    # argpartition selects the k best in O(n), only those k get sorted
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k == 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(nodes[i], scores[i].item()) for i in best]
+
+
+def topKDegree(graph, k):
+    csr = graphToCsr(graph)
+    return topKFromScores(csr.nodes, np.diff(csr.indptr) / max(len(csr.nodes) - 1, 1), k)
+
+
+def topKBetweenness(graph, k, pivots=None, seed=None, processes=None):
+    # betweenness cannot be pruned, but we still skip building and sorting a dict
+    if pivots is not None and pivots < 1:
+        raise ValueError(f"need at least one pivot, got pivots={pivots}")
+    csr = graphToCsr(graph)
+    numberOfNodes = len(csr.nodes)
+    if numberOfNodes < 3:
+        return topKFromScores(csr.nodes, np.zeros(numberOfNodes), k)
+    sources = None
+    scale = 1.0
+    if pivots is not None and pivots < numberOfNodes:
+        sources = np.random.default_rng(seed).choice(numberOfNodes, size=pivots, replace=False)
+        scale = numberOfNodes / pivots
+    scores = betweennessScores(csr, sources, processes) * scale / ((numberOfNodes - 1) * (numberOfNodes - 2))
+    return topKFromScores(csr.nodes, scores, k)
+
+
+def _componentSizes(csr):
+    # size of the component of every node
+    n = len(csr.indptr) - 1
+    sizes = np.zeros(n, dtype=np.int64)
+    for v in range(n):
+        if sizes[v] == 0:
+            reached = np.flatnonzero(bfsDistances(csr, v) >= 0)
+            sizes[reached] = len(reached)
+    return sizes
+
+
+def _prunedFarness(csr, source, reach, limit, dist):
+    """
+    BFS from source that gives up as soon as the farness (sum of distances)
+    is sure to be above limit. reach is the size of the component of source.
+    Returns the farness, or None if pruned. dist is scratch, left all -1.
+    """
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    visited = [frontier]
+    farness = 0
+    seen = 1
+    level = 0
+    result = None
+    while True:
+        nbrs = csr.indices[_expand(csr, frontier)[0]]
+        nbrs = nbrs[dist[nbrs] == -1]
+        tag = -2 - np.arange(len(nbrs))
+        dist[nbrs] = tag
+        frontier = nbrs[dist[nbrs] == tag]
+        level += 1
+        dist[frontier] = level
+        visited.append(frontier)
+        seen += len(frontier)
+        farness += level * len(frontier)
+        if len(frontier) == 0:
+            result = farness
+            break
+        # everything not reached yet is at least one level further away
+        if farness + (level + 1) * (reach - seen) > limit:
+            break
+    dist[np.concatenate(visited)] = -1
     return result
 
+
+def topKCloseness(graph, k):
+    """
+    Top k closeness (Wasserman-Faust, as closenessCentrality) without computing
+    every score exactly. Sources are tried by decreasing degree and each BFS
+    stops once a lower bound on its farness shows it cannot enter the top k.
+    """
+    csr = graphToCsr(graph)
+    n = len(csr.nodes)
+    if n < 2 or k <= 0:
+        return topKFromScores(csr.nodes, np.zeros(n), k)
+    reach = _componentSizes(csr) - 1
+    dist = np.full(n, -1, dtype=np.int64)
+    heap = []  # (closeness, -index) of the current best k, smallest first
+    for v in np.argsort(-np.diff(csr.indptr), kind="stable").tolist():
+        r = int(reach[v])
+        if r == 0:
+            score = 0.0
+        else:
+            # closeness = r*r/((n-1)*farness), so a minimal score means a maximal farness
+            limit = r * r / ((n - 1) * heap[0][0]) if len(heap) == k and heap[0][0] > 0 else np.inf
+            # the component of v has r + 1 nodes, v included
+            farness = _prunedFarness(csr, v, r + 1, limit, dist)
+            if farness is None:
+                continue
+            score = r * r / ((n - 1) * farness)
+        if len(heap) < k:
+            heapq.heappush(heap, (score, -v))
+        elif (score, -v) > heap[0]:
+            heapq.heapreplace(heap, (score, -v))
+    return [(csr.nodes[-i], score) for score, i in sorted(heap, reverse=True)]
+
+
 def calculateDistance(graph, start):
-    visited, queue = set(), [start]
+    queue = deque([start])
     distanceMap = {}
     distanceMap[start] = 0
     while queue:
-        vertex = queue.pop(0)
+        vertex = queue.popleft()
         for nextVertex in graph.neighbors(vertex):
             if nextVertex in distanceMap:
                 continue
@@ -1,73 +1,242 @@
 import networkx as nx
 import matplotlib.pyplot as plt
-import random
+import collections
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+
+# the signed generator reuses the Erdos-Renyi edge sampler of question 1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "q1"))
+from question1 import erdos_renyl_edges
+
+
+# Signed graph arrays
+
+# Compact signed adjacency: neighbors of node i are indices[indptr[i]:indptr[i+1]],
+# signs holds +1/-1 (int8) for each of them. edges[id] is a (u, v) pair of node
+# indices with sign edge_signs[id], and nodes[i] is the label of node i.
+SignedGraph = collections.namedtuple("SignedGraph", ["indptr", "indices", "signs", "edges", "edge_signs", "nodes"])
+
+
+def signed_arrays(n, edges, edge_signs, nodes=None):
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    edge_signs = np.asarray(edge_signs, dtype=np.int8)
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.argsort(src * n + dst)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    signs = np.concatenate((edge_signs, edge_signs))[order]
+    return SignedGraph(indptr, dst[order], signs, edges, edge_signs, nodes)
+
+
+def to_signed_graph(G):
+    # nx graph with sign='+'/'-' edge attributes -> SignedGraph (SignedGraph is returned as is)
+    if isinstance(G, SignedGraph):
+        return G
+    nodes = list(G.nodes)
+    index = {v: i for i, v in enumerate(nodes)}
+    m = G.number_of_edges()
+    edges = np.fromiter((index[x] for u, v in G.edges for x in (u, v)), dtype=np.int64, count=2 * m)
+    edge_signs = np.fromiter((-1 if sign == '-' else 1 for _, _, sign in G.edges(data='sign')), dtype=np.int8, count=m)
+    return signed_arrays(len(nodes), edges, edge_signs, nodes)
+
+
+def _expand(S, frontier):
+    # adjacency positions of all edges leaving frontier
+    starts = S.indptr[frontier]
+    cnt = S.indptr[frontier + 1] - starts
+    return np.repeat(starts - np.cumsum(cnt) + cnt, cnt) + np.arange(cnt.sum()), cnt
+
+
+def _tree_path(parent, depth, u, v):
+    # nodes of the BFS tree path u -> ... -> lca -> ... -> v
+    left, right = [u], [v]
+    while depth[u] > depth[v]:
+        u = int(parent[u])
+        left.append(u)
+    while depth[v] > depth[u]:
+        v = int(parent[v])
+        right.append(v)
+    while u != v:
+        u, v = int(parent[u]), int(parent[v])
+        left.append(u)
+        right.append(v)
+    return left + right[-2::-1]
 
 
 # Qusetion 3a
 
+def _sign_coloring(S):
+    """
+    BFS 2-coloring of SignedGraph S where crossing a '-' edge flips the color.
+    Returns (color, parent, depth): color is +1/-1 per node, parent and depth
+    describe the BFS forest (parent -1 for roots).
+    """
+    n = len(S.indptr) - 1
+    color = np.zeros(n, dtype=np.int8)
+    parent = np.full(n, -1, dtype=np.int64)
+    depth = np.zeros(n, dtype=np.int64)
+    deg = np.diff(S.indptr)
+    color[deg == 0] = 1
+    for start in np.flatnonzero(deg).tolist():
+        if color[start]:
+            continue
+        color[start] = 1
+        frontier = np.array([start], dtype=np.int64)
+        while len(frontier):
+            pos, cnt = _expand(S, frontier)
+            preds = np.repeat(frontier, cnt)
+            nbrs = S.indices[pos]
+            new = color[nbrs] == 0
+            preds, nbrs, pos = preds[new], nbrs[new], pos[new]
+            # a node reached from several predecessors keeps whichever write survived
+            tag = np.arange(len(nbrs))
+            parent[nbrs] = tag
+            first = parent[nbrs] == tag
+            preds, nbrs, pos = preds[first], nbrs[first], pos[first]
+            parent[nbrs] = preds
+            depth[nbrs] = depth[preds] + 1
+            color[nbrs] = color[preds] * S.signs[pos]
+            frontier = nbrs
+    return color, parent, depth
+
+
+def _frustrated_cycle(S, color, parent, depth):
+    # cycle (node indices) through the first edge whose sign disagrees with the colors, or None
+    u, v = S.edges[:, 0], S.edges[:, 1]
+    bad = np.flatnonzero(color[u] * color[v] != S.edge_signs)
+    if len(bad) == 0:
+        return None
+    return _tree_path(parent, depth, int(u[bad[0]]), int(v[bad[0]]))
+
+
 def check_balance(G):
-    triangles = [cycle for cycle in nx.cycle_basis(G) if len(cycle) == 3]
-    for t in triangles:
-        if not is_triangle_balanced(G, t):
-            return False, t
-    return True, None
+    """
+    Structural balance of a signed graph (nx.Graph with 'sign' edges, or
+    SignedGraph) in O(n + m): BFS 2-coloring where crossing a '-' edge flips
+    the color. Returns (True, None), or (False, cycle) where cycle is a list
+    of nodes closing a cycle with an odd number of '-' edges.
+    """
+    S = to_signed_graph(G)
+    cycle = _frustrated_cycle(S, *_sign_coloring(S))
+    if cycle is None:
+        return True, None
+    if S.nodes is not None:
+        cycle = [S.nodes[x] for x in cycle]
+    return False, cycle
 
 
 def is_triangle_balanced(G, triangle):
-    e1 = (triangle[0], triangle[1])
-    e2 = (triangle[1], triangle[2])
-    e3 = (triangle[0], triangle[2])
-    edges_sign = nx.get_edge_attributes(G, 'sign')
-    if e1 in edges_sign:  # undirected graph - check both i->j j->i
-        sign1 = edges_sign[e1]
-    else:
-        sign1 = edges_sign[e1[::-1]]
-    if e2 in edges_sign:
-        sign2 = edges_sign[e2]
-    else:
-        sign2 = edges_sign[e2[::-1]]
-    if e3 in edges_sign:
-        sign3 = edges_sign[e3]
-    else:
-        sign3 = edges_sign[e3[::-1]]
-    return [sign1, sign2, sign3].count('-') % 2 == 0
+    signs = [G.edges[triangle[i], triangle[(i + 1) % 3]]['sign'] for i in range(3)]
+    return signs.count('-') % 2 == 0
 
 
 # Qusetion 3a V2
 
-def check_balance_v2(G):
-    try:
-        G = get_connected_components_on_plus_edges_graph(G)
-    except NoConnectedComponentError as e:
-        return False, G, dict([(x,0) for x in e.err_group]), e.err_node
-    G.remove_edges_from(G.selfloop_edges())
-    component_list = [c for c in sorted(nx.connected_components(G), key=len, reverse=True)]
-    node_coloring = dict((k, 0) for k in G.nodes())
-    for component_nodes in component_list:
-        is_balanced, bad_vertex = check_component_is_balanced(G, list(component_nodes)[0], node_coloring)
-        if not is_balanced:
-            return False, G, node_coloring, bad_vertex
-    return True, G, None, None
-
-
-def check_component_is_balanced(G, start, node_coloring):
-    visited, queue = set(), [start]
-    node_coloring[start] = 1
-    while queue:
-        vertex = queue.pop(0)
-        neighbors_colors_already_used = set()
-        for nextVertex in G.neighbors(vertex):
-            neighbors_colors_already_used.add(node_coloring[nextVertex])
-            if node_coloring[nextVertex] == 0:
-                queue.append(nextVertex)
-        if 1 in neighbors_colors_already_used and 2 in neighbors_colors_already_used:
-            return False, vertex
-        else:
-            if 1 not in neighbors_colors_already_used:
-                node_coloring[vertex] = 1
-            else:
-                node_coloring[vertex] = 2
-    return True, None
+# Result of contract_plus_edges: supernode[v] is the supernode of node index v,
+# members[offsets[k]:offsets[k+1]] the node indices of supernode k (ascending,
+# so the first one is the smallest), and minus_edges the '-' edges between
+# different supernodes as (k, 2) supernode pairs, each pair once.
+# conflict is a '-' edge (node indices) inside one supernode, or None.
+Contraction = collections.namedtuple("Contraction", ["supernode", "members", "offsets", "minus_edges", "conflict"])
+
+
+def contract_plus_edges(G):
+    """
+    Merge every '+' connected group of G (nx.Graph or SignedGraph) into one
+    supernode with a union-find over the '+' edges (hooking roots and pointer
+    jumping over the whole edge array), then check the '-' edges in a second
+    pass. O((n + m) log n) numpy work, no python loop per node or edge.
+    """
+    S = to_signed_graph(G)
+    n = len(S.indptr) - 1
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return Contraction(empty, empty, np.zeros(1, dtype=np.int64), np.empty((0, 2), dtype=np.int64), None)
+    plus = S.edge_signs > 0
+    u, v = S.edges[plus, 0], S.edges[plus, 1]
+    root = np.arange(n)
+    while True:
+        ru, rv = root[u], root[v]
+        differ = ru != rv
+        if not differ.any():
+            break
+        np.minimum.at(root, np.maximum(ru, rv)[differ], np.minimum(ru, rv)[differ])
+        while True:
+            up = root[root]
+            if np.array_equal(up, root):
+                break
+            root = up
+    reps, supernode = np.unique(root, return_inverse=True)
+    members = np.argsort(supernode, kind="stable")
+    offsets = np.zeros(len(reps) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(supernode), out=offsets[1:])
+    # second pass: '-' edges inside a supernode make the graph unbalanced
+    minus = S.edges[~plus]
+    a, b = supernode[minus[:, 0]], supernode[minus[:, 1]]
+    inside = np.flatnonzero(a == b)
+    conflict = tuple(minus[inside[0]].tolist()) if len(inside) else None
+    keys = np.unique(np.minimum(a, b) * len(reps) + np.maximum(a, b))
+    keys = keys[keys // len(reps) != keys % len(reps)]
+    return Contraction(supernode, members, offsets, np.column_stack((keys // len(reps), keys % len(reps))), conflict)
+
+
+def _group(c, v):
+    # node indices of the supernode containing node index v
+    k = c.supernode[v]
+    return c.members[c.offsets[k]:c.offsets[k + 1]]
+
+
+def _representatives(c, labels):
+    # label of the first (smallest) member of every supernode
+    return [labels[x] for x in c.members[c.offsets[:-1]].tolist()]
+
+
+def check_balance_v2(G, as_arrays=False):
+    """
+    Balance check by contracting '+' groups (contract_plus_edges) and
+    2-coloring the supernode graph, whose edges are all '-'.
+    Returns (is_balanced, reduced graph, node_coloring, bad_vertex). When a
+    '-' edge falls inside a '+' group G itself is returned with that group
+    uncolored (0). Otherwise the reduced graph is an nx.Graph whose nodes
+    are one original node per supernode, or the Contraction itself when
+    as_arrays is set (then node_coloring is an int8 array over supernodes,
+    for big graphs).
+    Colors are 1/2, 0 for uncolored nodes.
+    """
+    S = to_signed_graph(G)
+    labels = S.nodes if S.nodes is not None else range(len(S.indptr) - 1)
+    c = contract_plus_edges(S)
+    if c.conflict is not None:
+        # a '-' edge inside a '+' group: report the group on the original graph
+        if as_arrays:
+            return False, c, np.zeros(len(c.offsets) - 1, dtype=np.int8), c.conflict[1]
+        group = _group(c, c.conflict[0])
+        return False, G, dict((labels[x], 0) for x in group.tolist()), labels[c.conflict[1]]
+    reduced = c if as_arrays else _reduced_graph(c, labels)
+    R = signed_arrays(len(c.offsets) - 1, c.minus_edges, -np.ones(len(c.minus_edges), dtype=np.int8))
+    color, parent, depth = _sign_coloring(R)
+    cycle = _frustrated_cycle(R, color, parent, depth)
+    if cycle is None:
+        return True, reduced, None, None
+    coloring = np.where(color > 0, 1, 2).astype(np.int8)
+    if as_arrays:
+        return False, reduced, coloring, cycle[0]
+    reps = _representatives(c, labels)
+    return False, reduced, dict(zip(reps, coloring.tolist())), reps[cycle[0]]
+
+
+def _reduced_graph(c, labels):
+    # nx graph of the supernodes, each named after its first member, with the '-' edges between them
+    reps = _representatives(c, labels)
+    res = nx.Graph()
+    res.add_nodes_from(reps)
+    res.add_edges_from(((reps[a], reps[b]) for a, b in c.minus_edges.tolist()), sign='-')
+    return res
+
 
 class NoConnectedComponentError(RuntimeError):
     def __init__(self, err_node, err_group):
@@ -75,38 +244,205 @@ class NoConnectedComponentError(RuntimeError):
         self.err_group = err_group
 
 def get_connected_components_on_plus_edges_graph(G):
-    res = G.copy()
-    for n in list(G.nodes):
-        if not res.has_node(n):
-            # we already handled this node by contracting it.
+    S = to_signed_graph(G)
+    labels = S.nodes if S.nodes is not None else range(len(S.indptr) - 1)
+    c = contract_plus_edges(S)
+    if c.conflict is not None:
+        group = _group(c, c.conflict[0])
+        raise NoConnectedComponentError(labels[c.conflict[1]], set(labels[x] for x in group.tolist()))
+    return _reduced_graph(c, labels)
+
+
+# Frustration index
+
+def frustration_count(G, color):
+    """Number of edges of G whose sign disagrees with the +1/-1 node colors."""
+    S = to_signed_graph(G)
+    color = np.asarray(color)
+    return int(np.count_nonzero(color[S.edges[:, 0]] * color[S.edges[:, 1]] != S.edge_signs))
+
+
+def local_search_frustration(S, color, rng, deadline=None):
+    """
+    Greedy descent from the +1/-1 coloring color: every round flips an
+    independent set of nodes whose flip removes more frustrated edges than it
+    creates (ties broken by rng), until no single flip helps or the deadline
+    (a time.time() value) passes.
+    Returns (color, frustration).
+    """
+    n = len(S.indptr) - 1
+    color = np.array(color, dtype=np.int8)
+    rows = np.repeat(np.arange(n), np.diff(S.indptr))
+    while deadline is None or time.time() <= deadline:
+        # gain[v] = frustrated - satisfied edges at v, the drop in frustration if v flips
+        agree = color[rows] * color[S.indices] * S.signs
+        gain = -np.bincount(rows, weights=agree, minlength=n)
+        prio = np.where(gain > 0, gain + rng.random(n), -np.inf)
+        if not np.isfinite(prio).any():
+            break
+        best = np.full(n, -np.inf)
+        np.maximum.at(best, rows, prio[S.indices])
+        flip = prio > best
+        color[flip] *= -1
+    return color, frustration_count(S, color)
+
+
+EXACT_FRUSTRATION_MAX_NODES = 30
+
+
+def exact_frustration(G, batch=1 << 12):
+    """
+    Frustration index by trying every coloring (node 0 fixed to +1), for
+    small graphs only: O(2^(n-1) * m). Returns (frustration, color).
+    """
+    S = to_signed_graph(G)
+    n = len(S.indptr) - 1
+    if n > EXACT_FRUSTRATION_MAX_NODES:
+        raise ValueError("exact frustration is limited to {} nodes, got {}".format(EXACT_FRUSTRATION_MAX_NODES, n))
+    if n == 0:
+        return 0, np.ones(0, dtype=np.int8)
+    u, v = S.edges[:, 0], S.edges[:, 1]
+    negative = S.edge_signs < 0
+    shift = np.arange(n, dtype=np.int64)
+    best, best_code = len(u) + 1, 0
+    for start in range(0, 1 << (n - 1), batch):
+        codes = np.arange(start, min(start + batch, 1 << (n - 1)), dtype=np.int64)[:, None] << 1
+        # bit x of code is 1 when node x is colored -1; an edge is frustrated when
+        # its ends differ xor it is negative
+        frustrated = ((codes >> shift[u]) ^ (codes >> shift[v])) & 1 != negative
+        counts = frustrated.sum(axis=1)
+        i = int(np.argmin(counts))
+        if counts[i] < best:
+            best, best_code = int(counts[i]), int(codes[i, 0])
+    return best, np.where((best_code >> shift) & 1, -1, 1).astype(np.int8)
+
+
+_frustration_graph = None
+
+
+def _init_frustration_worker(S):
+    global _frustration_graph
+    _frustration_graph = S
+
+
+def _frustration_restart(job):
+    # one random restart, skipped once the deadline (time.time()) has passed
+    seed, deadline = job
+    if deadline is not None and time.time() > deadline:
+        return None
+    S = _frustration_graph
+    rng = np.random.default_rng(seed)
+    color = rng.choice(np.array([-1, 1], dtype=np.int8), len(S.indptr) - 1)
+    return local_search_frustration(S, color, rng, deadline)
+
+
+def frustration_index(G, restarts=16, seed=None, processes=None, time_budget=None, exact_limit=16):
+    """
+    Minimum number of edge sign flips that make G balanced.
+    Graphs with at most exact_limit nodes are solved exactly. Larger ones get
+    an upper bound from local_search_frustration, started once from the BFS
+    sign coloring and then from restarts random colorings spread over a pool
+    of processes. After time_budget seconds running descents stop where they
+    are and restarts not begun yet are dropped.
+    Returns (frustration, color, exact) where color is the best +1/-1
+    coloring in node order and the frustrated edges are the ones to flip.
+    """
+    S = to_signed_graph(G)
+    if len(S.indptr) - 1 <= exact_limit:
+        return exact_frustration(S) + (True,)
+    global _frustration_graph
+    deadline = None if time_budget is None else time.time() + time_budget
+    rng = np.random.default_rng(seed)
+    best = local_search_frustration(S, _sign_coloring(S)[0], rng, deadline)
+    jobs = [(s, deadline) for s in np.random.SeedSequence(seed).spawn(restarts)]
+    if processes is None:
+        _frustration_graph = S
+        results = map(_frustration_restart, jobs)
+    else:
+        with multiprocessing.Pool(processes, _init_frustration_worker, (S,)) as pool:
+            results = pool.map(_frustration_restart, jobs)
+    for res in results:
+        if res is not None and res[1] < best[1]:
+            best = res
+    _frustration_graph = None
+    return best[1], best[0], False
+
+
+# Triangle census
+
+def _orient_signed(S):
+    # keep every edge once, from the lower (degree, id) rank to the higher one;
+    # returns the oriented CSR in rank space with its sorted keys u*n+v and signs,
+    # and order[rank] = node index
+    n = len(S.indptr) - 1
+    deg = np.diff(S.indptr)
+    order = np.lexsort((np.arange(n), deg))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    src = rank[np.repeat(np.arange(n), deg)]
+    dst = rank[S.indices]
+    mask = src < dst
+    keys = src[mask] * n + dst[mask]
+    sort = np.argsort(keys, kind="stable")
+    keys = keys[sort]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+    return indptr, keys % n, keys, S.signs[mask][sort], order
+
+
+def iter_signed_triangles(G, max_wedges=1 << 22):
+    """
+    Every triangle of G (nx.Graph or SignedGraph) exactly once, by the forward
+    algorithm: the wedge v <- u -> w of the degree ordered graph is a triangle
+    when the oriented edge v -> w exists, found by binary search in the
+    sorted edge keys. Yields chunks (u, v, w, minus) of node index arrays and
+    the number of '-' edges of each triangle, about max_wedges wedges each.
+    """
+    S = to_signed_graph(G)
+    n = len(S.indptr) - 1
+    indptr, indices, keys, signs, order = _orient_signed(S)
+    if len(keys) == 0:
+        return
+    outdeg = np.diff(indptr)
+    wedges = np.cumsum(outdeg * (outdeg - 1) // 2)
+    start = 0
+    while start < n:
+        done = wedges[start - 1] if start else 0
+        stop = min(max(int(np.searchsorted(wedges, done + max_wedges, side="right")), start + 1), n)
+        pos = np.arange(indptr[start], indptr[stop])
+        owner = np.repeat(np.arange(start, stop), outdeg[start:stop])
+        cnt = indptr[owner + 1] - pos - 1
+        total = int(cnt.sum())
+        start = stop
+        if total == 0:
             continue
-        attr = nx.get_edge_attributes(G, "sign")
-        def get_attr(edge):
-            # cause dict keys arent comutative
-            a,b = edge
-            return attr.get((a,b)) or attr.get((b,a))
-
-        cur_group = {n}
-        for e in list(res.edges(n)):
-            if get_attr(e) == '-':
-                # skip minus connections
-                pass
-            else:
-                # try to concat
-                assert e[0] == n
-                b = e[1]
-                for cur_edge in G.edges(b):
-                    assert cur_edge[0] == b
-                    err_candidate = cur_edge[1]
-                    # check if b has any minus edge to the current group
-                    if get_attr(cur_edge) == '-' and err_candidate in cur_group:
-                        #fail
-                        err = NoConnectedComponentError(b, cur_group)
-                        raise err
-                # successfully concat
-                cur_group.add(b)
-                res.remove_node(b)
-    return res
+        first = np.repeat(pos, cnt)
+        second = first + 1 + np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        query = indices[first] * n + indices[second]
+        at = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        found = keys[at] == query
+        first, second, at = first[found], second[found], at[found]
+        minus = (signs[first] < 0).astype(np.int8) + (signs[second] < 0) + (signs[at] < 0)
+        yield order[np.repeat(owner, cnt)[found]], order[indices[first]], order[indices[second]], minus
+
+
+def triangle_census(G, max_wedges=1 << 22):
+    """
+    Triad census of a signed graph. Returns (census, unbalanced) where
+    census[k] is the number of triangles with k '-' edges, i.e. the counts of
+    +++, ++-, +-- and --- triangles, and unbalanced[i] is the number of
+    unbalanced triangles (odd number of '-' edges) through node index i.
+    """
+    S = to_signed_graph(G)
+    n = len(S.indptr) - 1
+    census = np.zeros(4, dtype=np.int64)
+    unbalanced = np.zeros(n, dtype=np.int64)
+    for u, v, w, minus in iter_signed_triangles(S, max_wedges):
+        census += np.bincount(minus, minlength=4)
+        odd = minus % 2 == 1
+        for x in (u, v, w):
+            unbalanced += np.bincount(x[odd], minlength=n)
+    return census, unbalanced
 
 
 #####################################################################
@@ -114,22 +450,38 @@ def get_connected_components_on_plus_edges_graph(G):
 
 # Qusetion 3b
 
-def generateRandomNetworkWithER(p_plus):
+def signed_erdos_renyi(n, p=0.5, p_plus=0.5, seed=None, factions=None, noise=0.0, output="signed"):
+    """
+    Signed G(n, p): every pair is an edge with probability p, and '+' with
+    probability p_plus. With factions=k node i joins faction i % k instead,
+    edges inside a faction are '+' and edges across are '-', and then each
+    sign is flipped with probability noise (p_plus is ignored). With k <= 2
+    and noise=0 the result is balanced; with k > 2 it is only clusterable.
+    output - "signed" for a SignedGraph, "graph" for nx.Graph with sign='+'/'-'
+    """
+    rng = np.random.default_rng(seed)
+    chunks = list(erdos_renyl_edges(n, p, rng))
+    edges = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+    if factions is None:
+        signs = np.where(rng.random(len(edges)) < p_plus, 1, -1).astype(np.int8)
+    else:
+        signs = np.where(edges[:, 0] % factions == edges[:, 1] % factions, 1, -1).astype(np.int8)
+        signs[rng.random(len(edges)) < noise] *= -1
+    if output == "signed":
+        return signed_arrays(n, edges, signs)
+    if output != "graph":
+        raise ValueError("unknown output: " + str(output))
     G = nx.Graph()
-    n = 30
-    p = 0.5
-    for i in range(0, n):
-        G.add_node(i)
-    for i in range(0, n - 1):
-        for j in range(i + 1, n):
-            if p >= random.uniform(0, 1):  # create edge with prob >= p
-                if p_plus >= random.uniform(0, 1):  # edge is + with prob >= p_plus
-                    G.add_edge(i, j, sign='+')
-                else:
-                    G.add_edge(i, j, sign='-')
+    G.add_nodes_from(range(n))
+    G.add_edges_from((u, v, {'sign': '+' if sign > 0 else '-'})
+                     for (u, v), sign in zip(edges.tolist(), signs.tolist()))
     return G
 
 
+def generateRandomNetworkWithER(p_plus, n=30, p=0.5, seed=None):
+    return signed_erdos_renyi(n, p, p_plus, seed, output="graph")
+
+
 def generate_graphs_for_question_3b():
     G1 = generateRandomNetworkWithER(0.9)
     G2 = generateRandomNetworkWithER(0.5)
@@ -151,10 +503,8 @@ def check_balance_run():
     print_graph_with_reasons(G2, unbalanced_triangle_G2)
 
 def get_edges_of_triangle(G, triangle):
-    e1 = tuple(sorted((triangle[0], triangle[1])))
-    e2 = tuple(sorted((triangle[1], triangle[2])))
-    e3 = tuple(sorted((triangle[0], triangle[2])))
-    return [e1, e2, e3]
+    # works for any cycle, not only triangles: every pair of consecutive nodes
+    return [tuple(sorted((triangle[i], triangle[(i + 1) % len(triangle)]))) for i in range(len(triangle))]
 
 
 def print_graph_with_reasons(G, unbalanced_triangle):
@@ -371,17 +721,18 @@ def test2():
 
 
 def print_sign_statistics(G):
-    a = nx.get_edge_attributes(G, 'sign')
-    plus = 0
-    minus = 0
-    for k in a:
-        if a[k] == '+':
-            plus += 1
-        else:
-            minus += 1
+    S = to_signed_graph(G)
+    plus = int(np.count_nonzero(S.edge_signs > 0))
+    minus = len(S.edge_signs) - plus
     print("PLUS: " + str(plus))
     print("MINUS: " + str(minus))
     print("PRECENT: Plus- " + str(plus / (plus + minus)) + " Minus- " + str(minus / (plus + minus)))
+    census, unbalanced = triangle_census(S)
+    print("TRIANGLES: +++ " + str(census[0]) + " ++- " + str(census[1]) + " +-- " + str(census[2]) + " --- " + str(census[3]))
+    if unbalanced.any():
+        worst = int(np.argmax(unbalanced))
+        node = S.nodes[worst] if S.nodes is not None else worst
+        print("MOST UNBALANCED TRIANGLES: " + str(node) + " (" + str(unbalanced[worst]) + ")")
 
 
 def print_signed_graph(G):
@@ -1,7 +1,12 @@
 import collections
 from collections import defaultdict
 import sys
+import os
+import json
+import gzip
+import multiprocessing
 import networkx as nx
+import numpy as np
 
 
 # This class makes it easier mapping of edges to a number
@@ -41,87 +46,745 @@ class EdgeScores(defaultdict):
 
 
 def print_components(g):
-    for idx, component in enumerate(nx.connected_components(g)):
+    print_partition(nx.connected_components(g))
+
+
+def print_partition(components):
+    for idx, component in enumerate(components):
         print("Component {} of size:{}".format(idx+1, len(component)))
         print(component)
 
 
+# Compact adjacency: the neighbors of node i are indices[indptr[i]:indptr[i+1]]
+# and edge_ids holds the id of each of those edges. edges[id] is the (u, v)
+# pair of node indices (u < v) and nodes[i] is the label of node i.
+# edge_attrs maps an attribute name (e.g. "weight") to an array indexed by edge id.
+CSRGraph = collections.namedtuple("CSRGraph", ["indptr", "indices", "edge_ids", "edges", "nodes", "edge_attrs"],
+                                  defaults=(None,))
+
+
+def edges_to_csr(n, edges, nodes=None, edge_attrs=None):
+    """
+    Build CSRGraph over n nodes from an (m, 2) array of node index pairs.
+    Edge ids follow the sorted (u < v) order. Repeated edges are kept once,
+    with the attributes (arrays aligned with edges) of their first occurrence.
+    """
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    # sorting one u*n+v key is much faster than a lexsort on two columns
+    keys = edges[:, 0] * n + edges[:, 1]
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    edges = edges[order[first]]
+    if edge_attrs is not None:
+        edge_attrs = {name: np.asarray(values)[order[first]] for name, values in edge_attrs.items()}
+    m = len(edges)
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+    eid = np.concatenate((np.arange(m), np.arange(m)))
+    order = np.argsort(src * n + dst)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return CSRGraph(indptr, dst[order], eid[order], edges, nodes, edge_attrs)
+
+
+def graph_to_csr(g):
+    nodes = list(g.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.fromiter((index[x] for e in g.edges for x in e), dtype=np.int64,
+                        count=2 * g.number_of_edges())
+    return edges_to_csr(len(nodes), edges, nodes)
+
+
+def _expand(csr, frontier):
+    # adjacency positions of all edges leaving the nodes of frontier, and the count per node
+    starts = csr.indptr[frontier]
+    cnt = csr.indptr[frontier + 1] - starts
+    return np.repeat(starts - np.cumsum(cnt) + cnt, cnt) + np.arange(cnt.sum()), cnt
+
+
+def component_labels(csr):
+    """
+    Connected components straight from the csr.edges pairs: repeatedly hook
+    the larger root of every edge under the smaller one and flatten with
+    pointer jumping. Same result as component_labels in hw1/q1.
+    Return (labels, sizes): labels[v] in 0..c-1, sizes[c] = nodes in component c.
+    """
+    n = len(csr.indptr) - 1
+    src, dst = csr.edges[:, 0], csr.edges[:, 1]
+    lab = np.arange(n)
+    while True:
+        ls, ld = lab[src], lab[dst]
+        if np.array_equal(ls, ld):
+            break
+        # hook the larger root under the smaller one, then flatten the trees
+        np.minimum.at(lab, np.maximum(ls, ld), np.minimum(ls, ld))
+        while True:
+            nxt = lab[lab]
+            if np.array_equal(nxt, lab):
+                break
+            lab = nxt
+    _, labels = np.unique(lab, return_inverse=True)
+    return labels, np.bincount(labels)
+
+
+def subgraph_csr(csr, nodes):
+    """
+    Return CSRGraph of the subgraph induced by nodes (sorted node indices,
+    closed under neighborhood, e.g. whole components), relabeled to
+    0..len(nodes)-1 with edge ids renumbered in the same order.
+    Costs O(size of the subgraph) on top of one O(n) relabel array.
+    """
+    local = np.empty(len(csr.indptr) - 1, dtype=np.int64)
+    local[nodes] = np.arange(len(nodes))
+    offsets, cnt = _expand(csr, nodes)
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(cnt, out=indptr[1:])
+    old_ids = csr.edge_ids[offsets]
+    ids = np.unique(old_ids)
+    edge_attrs = None
+    if csr.edge_attrs is not None:
+        edge_attrs = {name: values[ids] for name, values in csr.edge_attrs.items()}
+    # nodes are sorted so the relabeling keeps neighbor lists and edge ids in order
+    return CSRGraph(indptr, local[csr.indices[offsets]], np.searchsorted(ids, old_ids),
+                    local[csr.edges[ids]], np.asarray(csr.nodes)[nodes], edge_attrs)
+
+
+def largest_component(csr):
+    """
+    Return CSRGraph of the largest connected component of csr; only that
+    component is copied.
+    """
+    labels, sizes = component_labels(csr)
+    if len(sizes) <= 1:
+        return csr
+    return subgraph_csr(csr, np.flatnonzero(labels == np.argmax(sizes)))
+
+
+def _accumulate_edge_dependencies(csr, source, scores, dist, sigma, delta, alive=None):
+    """
+    Iterative Brandes pass from node index source: counts shortest paths
+    (sigma) level by level, then walks the levels back and adds the
+    dependency of every shortest path dag edge to scores[edge id].
+    dist (all -1), sigma and delta are scratch arrays, reset on return.
+    alive is an optional boolean mask over edge ids, other edges are skipped.
+    """
+    dist[source] = 0
+    sigma[source] = 1
+    frontier = np.array([source], dtype=np.int64)
+    visited = [frontier]
+    levels = []
+    level = 0
+    while len(frontier):
+        pos, cnt = _expand(csr, frontier)
+        preds = np.repeat(frontier, cnt)
+        if alive is not None:
+            keep = alive[csr.edge_ids[pos]]
+            pos, preds = pos[keep], preds[keep]
+        nbrs = csr.indices[pos]
+        new = nbrs[dist[nbrs] == -1]
+        dist[new] = level + 1
+        on_dag = dist[nbrs] == level + 1
+        preds, nbrs, pos = preds[on_dag], nbrs[on_dag], pos[on_dag]
+        np.add.at(sigma, nbrs, sigma[preds])
+        levels.append((preds, nbrs, csr.edge_ids[pos]))
+        frontier = np.unique(new)
+        visited.append(frontier)
+        level += 1
+    for preds, nbrs, eids in reversed(levels):
+        flow = sigma[preds] / sigma[nbrs] * (1 + delta[nbrs])
+        # an edge is on the dag of one source at most once
+        scores[eids] += flow
+        np.add.at(delta, preds, flow)
+    touched = np.concatenate(visited)
+    dist[touched] = -1
+    sigma[touched] = 0
+    delta[touched] = 0
+
+
+def edge_betweenness_sums(csr, sources, alive=None):
+    """
+    Return float array (indexed by edge id) of the summed edge dependencies
+    of the given source node indices, using only alive edges if given.
+    """
+    n = len(csr.indptr) - 1
+    scores = np.zeros(len(csr.edges))
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n)
+    delta = np.zeros(n)
+    for source in sources:
+        _accumulate_edge_dependencies(csr, source, scores, dist, sigma, delta, alive)
+    return scores
+
+
+_worker_csr = None
+
+
+def _init_worker(csr):
+    # csr may be a snapshot path, then every worker maps the same file
+    global _worker_csr
+    _worker_csr = load_snapshot(csr) if isinstance(csr, str) else csr
+
+
+def _edge_betweenness_worker(sources):
+    return edge_betweenness_sums(_worker_csr, sources)
+
+
+def edge_betweenness(csr, processes=None):
+    """
+    Brandes edge betweenness of CSRGraph csr, as a float array indexed by
+    edge id. With processes the sources are split over a pool and the partial
+    arrays are summed. csr may also be a snapshot path (see save_snapshot),
+    then the workers map the file instead of receiving a pickled graph.
+    """
+    shared = csr
+    if isinstance(csr, str):
+        csr = load_snapshot(csr)
+    sources = np.arange(len(csr.indptr) - 1)
+    if processes is None:
+        scores = edge_betweenness_sums(csr, sources)
+    else:
+        with multiprocessing.Pool(processes, _init_worker, (shared,)) as pool:
+            scores = sum(pool.map(_edge_betweenness_worker, np.array_split(sources, processes * 4)))
+    # every pair is counted from both ends. Round so that equal scores summed in
+    # a different order still tie in get_highest
+    return np.round(scores / 2, 9)
+
+
+def _to_edge_scores(csr, scores):
+    res = EdgeScores()
+    for (u, v), score in zip(csr.edges.tolist(), scores.tolist()):
+        res[csr.nodes[u], csr.nodes[v]] = score
+    return res
+
+
 def calc_node_betweeness(g, n):
     """
     Helper function for calc_edge_betweenness.
     Calculate the edge betweenness scores for bfs garph starting in
     node labeled n in graph g
     """
-    t = nx.bfs_tree(g, n)
-    weights = EdgeScores()
-    def recursive_update(G, starting_node, weights):
-        """
-        Update weights on graph G starting from starting_node
-        Returns weight of the edges leading to starting_node
-        """
-        out_edges = G.edges(starting_node)
-        if len(out_edges) == 0:
-            for e in G.in_edges(starting_node):
-                weights[e] = 1
-            return 1
-        # else: recursively update the dict for all children.
-        # Calculate edge sum of children
-        total = 0
-        for u,v in out_edges:
-            total += recursive_update(G, v, weights)
-        # update weight of edge leading here(one edge,really): weight is children_total+1
-        for e in G.in_edges(starting_node):
-            weights[e] = total + 1
-        return total + 1
-    recursive_update(t, n, weights)
-    return weights
-
-
-def calc_edge_betweenness(g):
+    csr = graph_to_csr(g)
+    scores = edge_betweenness_sums(csr, [csr.nodes.index(n)])
+    return _to_edge_scores(csr, scores)
+
+
+def calc_edge_betweenness(g, processes=None):
     """
     Given graph g, calculate edge betweeness for each edge.
     Returns EdgeScores class(dict-like edge to score)
     """
-    totals = EdgeScores()
-    for node in g.nodes:
-        cur_scores = calc_node_betweeness(g, node)
-        for e in cur_scores:
-            totals[e] += cur_scores[e]
-    # finally, divide all values by 2:
-    for e in totals:
-        totals[e] = int(totals[e]/2)
-    return totals
+    csr = graph_to_csr(g)
+    return _to_edge_scores(csr, edge_betweenness(csr, processes))
+
+
+class Dendrogram(object):
+    """
+    Component splits recorded by girvan_newman, so a partition into any
+    number of components can be read afterwards without rerunning.
+    Node i is nodes[i]; every split relabels only the nodes that left the
+    biggest piece, so the whole history costs O(n log n) memory.
+    """
+    def __init__(self, nodes, labels):
+        self.nodes = nodes
+        self.initial = labels.copy()
+        # list of (edges removed since the previous split, node indices,
+        # their new labels, #components after)
+        self.splits = []
+
+    def num_components(self):
+        if self.splits:
+            return self.splits[-1][3]
+        return len(set(self.initial.tolist()))
+
+    def labels(self, k):
+        """
+        Return label array of the first partition with at least k components
+        (or the finest one recorded).
+        """
+        labels = self.initial.copy()
+        count = len(set(labels.tolist()))
+        for _, moved, new_labels, after in self.splits:
+            if count >= k:
+                break
+            labels[moved] = new_labels
+            count = after
+        return labels
+
+    def partition(self, k):
+        """
+        Return list of node sets, ordered like nx.connected_components.
+        """
+        return label_partition(self.nodes, self.labels(k))
+
+
+class EdgeScoreTree(object):
+    """
+    Scores of edges 0..m-1 kept in a max segment tree, so the highest edges
+    are found in O(log m) per tie instead of scanning every score.
+    Removed edges hold -inf.
+    """
+    def __init__(self, m):
+        self.size = 1 << max(m - 1, 0).bit_length()
+        self.tree = np.full(2 * self.size, -np.inf)
+
+    def __getitem__(self, edge_id):
+        return self.tree[self.size + edge_id]
+
+    def update(self, edge_ids, scores):
+        idx = self.size + np.asarray(edge_ids, dtype=np.int64)
+        self.tree[idx] = scores
+        # fix the maxima on the paths to the root, one tree level at a time
+        idx = np.unique(idx // 2)
+        while len(idx) and idx[-1] >= 1:
+            idx = idx[idx >= 1]
+            self.tree[idx] = np.maximum(self.tree[2 * idx], self.tree[2 * idx + 1])
+            idx = np.unique(idx // 2)
+
+    def remove(self, edge_ids):
+        self.update(edge_ids, -np.inf)
+
+    def get_highest(self):
+        """
+        Return sorted array of the edge ids that have the maximum score.
+        """
+        best = self.tree[1]
+        idx = np.array([1], dtype=np.int64)
+        if best == -np.inf:
+            return idx[:0]
+        while idx[0] < self.size:
+            idx = np.stack((2 * idx, 2 * idx + 1), axis=1).ravel()
+            idx = idx[self.tree[idx] == best]
+        return idx - self.size
+
+
+def _reachable(csr, start, alive, mark):
+    """
+    Return sorted node indices reachable from start over alive edges.
+    mark is a boolean scratch array, left all False.
+    """
+    mark[start] = True
+    frontier = np.array([start], dtype=np.int64)
+    visited = [frontier]
+    while len(frontier):
+        pos, _ = _expand(csr, frontier)
+        nbrs = csr.indices[pos[alive[csr.edge_ids[pos]]]]
+        frontier = np.unique(nbrs[~mark[nbrs]])
+        mark[frontier] = True
+        visited.append(frontier)
+    res = np.sort(np.concatenate(visited))
+    mark[res] = False
+    return res
+
+
+def _component_edges(csr, component, alive):
+    # ids of the alive edges inside a component (closed under alive edges)
+    ids = csr.edge_ids[_expand(csr, component)[0]]
+    return np.unique(ids[alive[ids]])
+
+
+def girvan_newman(network, k=None):
+    """
+    Incremental Girvan-Newman. Removes the highest betweenness edges until
+    there are k components (or no edges when k is None) and returns the
+    Dendrogram. After every removal betweenness is recomputed only inside the
+    components that lost an edge, the rest of the scores stay valid.
+    network (nx.Graph or CSRGraph) is not modified.
+    """
+    csr = network if isinstance(network, CSRGraph) else graph_to_csr(network)
+    nodes = csr.nodes
+    n, m = len(nodes), len(csr.edges)
+    alive = np.ones(m, dtype=bool)
+    mark = np.zeros(n, dtype=bool)
+    scores = EdgeScoreTree(m)
+
+    def rescore(component):
+        ids = _component_edges(csr, component, alive)
+        if len(ids):
+            # same rounding as edge_betweenness, so ties stay ties
+            sums = edge_betweenness_sums(csr, component, alive)
+            scores.update(ids, np.round(sums[ids] / 2, 9))
+
+    # component label of every node and node indices of every component
+    labels = np.full(n, -1, dtype=np.int64)
+    members = {}
+    for v in range(n):
+        if labels[v] == -1:
+            members[len(members)] = component = _reachable(csr, v, alive, mark)
+            labels[component] = len(members) - 1
+    dendrogram = Dendrogram(nodes, labels)
+    next_label = len(members)
+    for component in members.values():
+        rescore(component)
+
+    removed = []
+    left_edges = m
+    while left_edges > 0 and (k is None or len(members) < k):
+        highest = scores.get_highest()
+        alive[highest] = False
+        scores.remove(highest)
+        left_edges -= len(highest)
+        removed.extend((nodes[u], nodes[v]) for u, v in csr.edges[highest].tolist())
+        moved, new_labels = [], []
+        for label in np.unique(labels[csr.edges[highest, 0]]).tolist():
+            # split the component into its new pieces, the biggest keeps the label
+            left = members.pop(label)
+            pieces = []
+            while len(left):
+                piece = _reachable(csr, left[0], alive, mark)
+                left = np.setdiff1d(left, piece, assume_unique=True)
+                pieces.append(piece)
+            pieces.sort(key=len, reverse=True)
+            members[label] = pieces[0]
+            for piece in pieces[1:]:
+                members[next_label] = piece
+                labels[piece] = next_label
+                moved.append(piece)
+                new_labels.append(np.full(len(piece), next_label))
+                next_label += 1
+            for piece in pieces:
+                rescore(piece)
+        if moved:
+            dendrogram.splits.append((removed, np.concatenate(moved), np.concatenate(new_labels), len(members)))
+            removed = []
+    return dendrogram
 
 
 def neuman_girvan(network, k):
+    dendrogram = girvan_newman(network, k)
+    partition = dendrogram.partition(k)
+    print_partition(partition)
+    return partition
+
+
+def label_partition(nodes, labels):
+    """
+    Return list of node sets, one per label, ordered like
+    nx.connected_components (by the first node of every set).
+    """
+    groups = collections.OrderedDict()
+    if isinstance(nodes, np.ndarray):
+        nodes = nodes.tolist()
+    for node, label in zip(nodes, np.asarray(labels).tolist()):
+        groups.setdefault(label, set()).add(node)
+    return list(groups.values())
+
+
+def _edge_weights(csr):
+    if csr.edge_attrs is not None and "weight" in csr.edge_attrs:
+        return np.asarray(csr.edge_attrs["weight"], dtype=np.float64)
+    return np.ones(len(csr.edges))
+
+
+def modularity(network, partition, resolution=1.0):
+    """
+    Newman modularity of a partition of network (nx.Graph or CSRGraph, using
+    the "weight" edge attribute of a CSRGraph when present). partition is a
+    list of node sets (as print_partition takes) or a label array over the
+    node indices of a CSRGraph.
+    """
+    csr = network if isinstance(network, CSRGraph) else graph_to_csr(network)
+    n = len(csr.indptr) - 1
+    if isinstance(partition, np.ndarray):
+        labels = partition
+    else:
+        index = {node: i for i, node in enumerate(csr.nodes)}
+        labels = np.full(n, -1, dtype=np.int64)
+        for label, component in enumerate(partition):
+            labels[[index[node] for node in component]] = label
+        if (labels == -1).any():
+            raise ValueError("partition misses {} of the {} nodes".format(int((labels == -1).sum()), n))
+    w = _edge_weights(csr)
+    total = w.sum()
+    if total == 0:
+        return 0.0
+    u, v = csr.edges[:, 0], csr.edges[:, 1]
+    inside = w[labels[u] == labels[v]].sum()
+    strength = np.bincount(u, w, minlength=n) + np.bincount(v, w, minlength=n)
+    tot = np.bincount(labels, strength)
+    return float(inside / total - resolution * (tot ** 2).sum() / (4 * total ** 2))
+
+
+def _louvain_moves(indptr, indices, weights, strength, total, resolution, rng):
+    """
+    Local moving phase of Louvain on one level: visit the nodes in random
+    order and move each to the neighbor community with the best modularity
+    gain w(i, c) - resolution * tot(c) * k(i) / 2m, keeping community totals
+    up to date. Later passes only revisit neighbors of nodes that moved, until
+    a pass moves nothing.
+    Return (community of every node, whether any node moved).
+    """
+    n = len(indptr) - 1
+    comm = np.arange(n)
+    tot = strength.copy()
+    scale = resolution / (2 * total)
+    moved = False
+    active = np.diff(indptr) > 0
+    while active.any():
+        visit = np.flatnonzero(active)
+        active[:] = False
+        for i in visit[rng.permutation(len(visit))].tolist():
+            lo, hi = indptr[i], indptr[i + 1]
+            ci, ki = comm[i], strength[i]
+            tot[ci] -= ki
+            cs, inv = np.unique(comm[indices[lo:hi]], return_inverse=True)
+            gains = np.bincount(inv, weights[lo:hi]) - scale * tot[cs] * ki
+            stay = cs == ci
+            stay_gain = gains[stay][0] if stay.any() else -scale * tot[ci] * ki
+            best = int(np.argmax(gains))
+            if gains[best] > stay_gain + 1e-12:
+                comm[i] = ci = cs[best]
+                active[indices[lo:hi]] = True
+                moved = True
+            tot[ci] += ki
+    return comm, moved
+
+
+def _aggregate(indptr, indices, weights, loops, comm):
+    # graph of communities: weights between communities add up, weights inside
+    # one become its self loop; returns the new level and the relabeled comm
+    n = len(indptr) - 1
+    _, comm = np.unique(comm, return_inverse=True)
+    k = int(comm.max()) + 1
+    cu = comm[np.repeat(np.arange(n), np.diff(indptr))]
+    cv = comm[indices]
+    same = cu == cv
+    # every edge is in the adjacency twice, so halve the internal weight
+    loops = np.bincount(comm, loops, minlength=k) + np.bincount(cu[same], weights[same], minlength=k) / 2
+    keys, inv = np.unique(cu[~same] * k + cv[~same], return_inverse=True)
+    new_indptr = np.zeros(k + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // k, minlength=k), out=new_indptr[1:])
+    return new_indptr, keys % k, np.bincount(inv, weights[~same]), loops, comm
+
+
+def louvain_labels(csr, resolution=1.0, seed=None):
+    """
+    Louvain community detection over the CSRGraph arrays: repeat the local
+    moving phase and contract every community into one node, until a level
+    moves no node. Uses the "weight" edge attribute when present.
+    Return int64 array with the community of every node index.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(csr.indptr) - 1
+    weights = _edge_weights(csr)[csr.edge_ids]
+    total = weights.sum() / 2
+    labels = np.arange(n)
+    if total == 0:
+        return labels
+    indptr, indices, loops = csr.indptr, csr.indices, np.zeros(n)
     while True:
-        num_of_components = len(list(nx.connected_components(network)))
-        if num_of_components >= k or network.number_of_edges() == 0:
-            # algorithm is finished
-            break
-        scores = calc_edge_betweenness(network)
-        network.remove_edges_from(scores.get_highest())
-    print_components(network)
+        strength = np.bincount(np.repeat(np.arange(len(indptr) - 1), np.diff(indptr)), weights,
+                               minlength=len(indptr) - 1) + 2 * loops
+        comm, moved = _louvain_moves(indptr, indices, weights, strength, total, resolution, rng)
+        if not moved:
+            return labels
+        indptr, indices, weights, loops, comm = _aggregate(indptr, indices, weights, loops, comm)
+        labels = comm[labels]
 
 
-def load_graph(fname):
+def louvain(network, resolution=1.0, seed=None):
+    """
+    Print the Louvain communities of network (nx.Graph or CSRGraph) like
+    print_components, and return them as a list of node sets.
+    """
+    csr = network if isinstance(network, CSRGraph) else graph_to_csr(network)
+    partition = label_partition(csr.nodes, louvain_labels(csr, resolution, seed))
+    print_partition(partition)
+    return partition
+
+
+def _open_edge_file(fname):
+    if str(fname).endswith(".gz"):
+        return gzip.open(fname, "rb")
+    return open(fname, "rb")
+
+
+def iter_edge_chunks(fname, weighted=False, comments=b"#%", chunk_bytes=1 << 26):
+    """
+    Parse an edge list ("u v" or "u v weight" per line, any whitespace,
+    optionally gzipped) about chunk_bytes at a time.
+    Yields (edges, weights): int64 (k, 2) array of node ids and a float64
+    array of k weights (None when not weighted).
+    Lines starting with one of the comments characters are skipped.
+    """
+    cols = 3 if weighted else 2
+    dtype = np.float64 if weighted else np.int64
+    with _open_edge_file(fname) as fl:
+        rest = b""
+        while True:
+            block = fl.read(chunk_bytes)
+            data = rest + block
+            if block:
+                # keep the partial last line for the next chunk
+                cut = data.rfind(b"\n") + 1
+                data, rest = data[:cut], data[cut:]
+            if any(c in data for c in comments):
+                data = b"\n".join(line for line in data.split(b"\n")
+                                  if not line.lstrip()[:1] or line.lstrip()[0] not in comments)
+            values = np.fromstring(data, dtype=dtype, sep=" ") if data.strip() else np.empty(0, dtype=dtype)
+            if len(values) % cols:
+                raise ValueError("{}: expected {} columns per line".format(fname, cols))
+            values = values.reshape(-1, cols)
+            if len(values):
+                if weighted:
+                    yield values[:, :2].astype(np.int64), values[:, 2]
+                else:
+                    yield values, None
+            if not block:
+                break
+
+
+def load_edge_list(fname, weighted=False, comments=b"#%", chunk_bytes=1 << 26):
+    """
+    Load an edge list file into a CSRGraph without building python objects
+    per edge. Node ids are relabeled to 0..n-1, csr.nodes holds the original
+    ids (sorted) and weights go to csr.edge_attrs["weight"].
+    """
+    edges, weights = [], []
+    for chunk, chunk_weights in iter_edge_chunks(fname, weighted, comments, chunk_bytes):
+        edges.append(chunk)
+        weights.append(chunk_weights)
+    edges = np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+    nodes, edges = np.unique(edges, return_inverse=True)
+    attrs = {"weight": np.concatenate(weights)} if weighted and len(weights) else None
+    return edges_to_csr(len(nodes), edges.reshape(-1, 2), nodes, attrs)
+
+
+def load_graph(fname, as_csr=False, weighted=False, cached=False):
     """
     Load graph from a file formatted as the communities file in the assignment.
+    Returns nx.Graph, or the CSRGraph from load_edge_list if as_csr is set.
+    With cached the graph comes from load_edge_list_cached.
     """
+    csr = (load_edge_list_cached if cached else load_edge_list)(fname, weighted)
+    print("Loaded graph with {} nodes".format(len(csr.nodes)))
+    if as_csr:
+        return csr
     g = nx.Graph()
-    with open(fname) as fl:
-        for line in fl:
-            u, v = line.split(" ")
-            g.add_edge(int(u), int(v))
-    print("Loaded graph with {} nodes".format(len(g.nodes)))
+    nodes = csr.nodes.tolist()
+    g.add_nodes_from(nodes)
+    if weighted:
+        g.add_weighted_edges_from((nodes[u], nodes[v], w) for (u, v), w in
+                                  zip(csr.edges.tolist(), csr.edge_attrs["weight"].tolist()))
+    else:
+        g.add_edges_from((nodes[u], nodes[v]) for u, v in csr.edges.tolist())
     return g
 
 
+SNAPSHOT_MAGIC = b"CSRSNAP1"
+SNAPSHOT_ALIGN = 64
+
+
+def save_snapshot(csr, fname, source=None):
+    """
+    Write CSRGraph csr to a single binary file: magic, header length, a json
+    header describing every array, then the raw arrays aligned to 64 bytes.
+    Integer node labels are stored as an array, other labels in the header.
+    Edge attributes must have a fixed size numpy dtype (e.g. int8 sign).
+    source is an optional json-able dict kept in the header (see
+    snapshot_source), e.g. the options the graph was loaded with.
+    """
+    arrays = collections.OrderedDict([("indptr", csr.indptr), ("indices", csr.indices),
+                                      ("edge_ids", csr.edge_ids), ("edges", csr.edges)])
+    header = {"nodes": None, "edge_attrs": [], "source": source}
+    if csr.nodes is not None:
+        nodes = np.asarray(csr.nodes)
+        if nodes.dtype.kind in "iu":
+            arrays["nodes"] = nodes
+        else:
+            header["nodes"] = list(csr.nodes)
+    for name, values in (csr.edge_attrs or {}).items():
+        values = np.asarray(values)
+        if values.dtype.hasobject:
+            raise ValueError("edge attribute {} has no fixed size dtype".format(name))
+        arrays["attr:" + name] = values
+        header["edge_attrs"].append(name)
+
+    def align(x):
+        return -(-x // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+
+    # offsets depend on the header size, so lay out after a dry run
+    header["arrays"] = {name: {"dtype": np.asarray(a).dtype.str, "shape": list(np.shape(a)), "offset": 0}
+                        for name, a in arrays.items()}
+    while True:
+        blob = json.dumps(header).encode()
+        offset = align(len(SNAPSHOT_MAGIC) + 8 + len(blob))
+        changed = False
+        for name, a in arrays.items():
+            if header["arrays"][name]["offset"] != offset:
+                header["arrays"][name]["offset"] = offset
+                changed = True
+            offset = align(offset + np.asarray(a).nbytes)
+        if not changed:
+            break
+    with open(fname, "wb") as fl:
+        fl.write(SNAPSHOT_MAGIC)
+        fl.write(np.uint64(len(blob)).tobytes())
+        fl.write(blob)
+        for name, a in arrays.items():
+            fl.seek(header["arrays"][name]["offset"])
+            np.ascontiguousarray(a).tofile(fl)
+
+
+def _snapshot_header(fname):
+    with open(fname, "rb") as fl:
+        if fl.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError("{} is not a graph snapshot".format(fname))
+        size = int(np.frombuffer(fl.read(8), dtype=np.uint64)[0])
+        return json.loads(fl.read(size).decode())
+
+
+def snapshot_source(fname):
+    """Return the source dict given to save_snapshot, or None."""
+    return _snapshot_header(fname).get("source")
+
+
+def load_snapshot(fname, mmap=True):
+    """
+    Open a file written by save_snapshot. With mmap the arrays are read-only
+    np.memmap views of the file: opening is near instant and processes that
+    open the same file share the pages instead of copying the graph.
+    """
+    header = _snapshot_header(fname)
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype, shape = np.dtype(info["dtype"]), tuple(info["shape"])
+        if not mmap or 0 in shape:
+            count = int(np.prod(shape))
+            arrays[name] = np.fromfile(fname, dtype=dtype, count=count, offset=info["offset"]).reshape(shape)
+        else:
+            arrays[name] = np.memmap(fname, dtype=dtype, mode="r", offset=info["offset"], shape=shape)
+    nodes = arrays.get("nodes", header["nodes"])
+    attrs = {name: arrays["attr:" + name] for name in header["edge_attrs"]} or None
+    return CSRGraph(arrays["indptr"], arrays["indices"], arrays["edge_ids"], arrays["edges"], nodes, attrs)
+
+
+def load_edge_list_cached(fname, weighted=False, comments=b"#%"):
+    """
+    load_edge_list, but keep a snapshot next to the text file (fname + ".csr")
+    and open that instead while it is newer than the text file and was
+    loaded with the same weighted and comments options.
+    """
+    snapshot = str(fname) + ".csr"
+    source = {"weighted": bool(weighted), "comments": comments.decode("latin-1")}
+    if (os.path.exists(snapshot) and os.path.getmtime(snapshot) >= os.path.getmtime(fname)
+            and snapshot_source(snapshot) == source):
+        return load_snapshot(snapshot)
+    csr = load_edge_list(fname, weighted, comments)
+    save_snapshot(csr, snapshot, source)
+    return csr
+
+
 def biggest_component(G):
     """
-    Return largest connected component of graph G
+    Return largest connected component of graph G: a compact CSRGraph for a
+    CSRGraph, a subgraph view (no copy) for nx.Graph
     """
-    Gc = max(nx.connected_component_subgraphs(G), key=len)
+    if isinstance(G, CSRGraph):
+        Gc = largest_component(G)
+    else:
+        Gc = G.subgraph(max(nx.connected_components(G), key=len))
     print("Larget component size: {}".format(len(Gc.nodes)))
     return Gc
 
@@ -141,11 +804,14 @@ def get_lecture_graph():
     return g
 
 def main(input_file):
-    g = load_graph(input_file)
+    g = load_graph(input_file, as_csr=True, cached=True)
     g = biggest_component(g)
     # this is for debugging:
     # g = get_lecture_graph()
-    neuman_girvan(g, 3)
+    partition = neuman_girvan(g, 3)
+    print("Girvan-Newman modularity: {}".format(modularity(g, partition)))
+    partition = louvain(g, seed=0)
+    print("Louvain modularity: {}".format(modularity(g, partition)))
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -1,9 +1,84 @@
+import itertools
+import networkx as nx
+import numpy as np
+
+
 def three_groups(n):
+    """Three disjoint cliques on nodes 0..n-1, sizes as even as possible."""
+    return planted_partition(even_sizes(3, n), 1, 0)[0]
+
+
+def _skip_sample(total, p, rng, chunk_size=1 << 20):
+    # sorted indices in [0, total), each kept with probability p, drawn by
+    # geometric skips between kept indices: O(1 + total * p) expected
+    if total <= 0 or p <= 0:
+        return np.empty(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(total, dtype=np.int64)
+    chunks, last = [], -1
+    while last < total - 1:
+        # enough draws to pass the end of the range in one batch most of
+        # the time, so small blocks don't pay for a full chunk
+        remaining = (total - 1 - last) * p
+        size = min(chunk_size, int(remaining + 4 * np.sqrt(remaining)) + 16)
+        idx = last + np.cumsum(rng.geometric(p, size=size), dtype=np.int64)
+        last = int(idx[-1])
+        chunks.append(idx[idx < total])
+    return np.concatenate(chunks)
+
+
+def _block_edges(lo_a, size_a, lo_b, size_b, p, rng):
+    if lo_a == lo_b:
+        # pairs (v, w), w < v, of one block numbered v*(v-1)/2 + w
+        idx = _skip_sample(size_a * (size_a - 1) // 2, p, rng)
+        v = ((1 + np.sqrt(1 + 8 * idx.astype(np.float64))) // 2).astype(np.int64)
+        # fix float rounding so that v*(v-1)/2 <= idx < v*(v+1)/2
+        v -= v * (v - 1) // 2 > idx
+        v += v * (v + 1) // 2 <= idx
+        return np.column_stack((lo_a + v, lo_a + idx - v * (v - 1) // 2))
+    idx = _skip_sample(size_a * size_b, p, rng)
+    return np.column_stack((lo_a + idx // size_b, lo_b + idx % size_b))
+
+
+def stochastic_block_model(sizes, probs, seed=None, output="graph"):
+    """
+    Input:  sizes - number of nodes in every group, group i gets the next
+                    sizes[i] node ids
+            probs - probs[i][j] is the edge probability between groups i and j
+                    (only i <= j is read)
+            seed - seed (or numpy Generator) for reproducible output
+            output - "graph" for nx.Graph, "edges" for an (m, 2) int64 edge array
+    Return (graph or edges, labels) where labels[v] is the group of node v.
+    Each block is sampled with geometric skips, so the work is O(n + m + k^2).
+    """
+    rng = np.random.default_rng(seed)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    lo = np.concatenate(([0], np.cumsum(sizes)))
+    labels = np.repeat(np.arange(len(sizes)), sizes)
+    blocks = [_block_edges(lo[i], sizes[i], lo[j], sizes[j], probs[i][j], rng)
+              for i, j in itertools.combinations_with_replacement(range(len(sizes)), 2)]
+    edges = np.concatenate(blocks) if blocks else np.empty((0, 2), dtype=np.int64)
+    if output == "edges":
+        return edges, labels
+    if output != "graph":
+        raise ValueError("unknown output: " + str(output))
     g = nx.Graph()
-    group_size = n//3
-    nodes = list(range(n))
-    g.add_nodes_from(nodes)
-    for i in range(3):
-        edges = itertools.combinations(range(i*group_size, i*group_size + group_size, 1),2)
-        g.add_edges_from(edges)
-    return g
+    g.add_nodes_from(range(len(labels)))
+    g.add_edges_from(edges.tolist())
+    return g, labels
+
+
+def planted_partition(sizes, p_in, p_out, seed=None, output="graph"):
+    """
+    Stochastic block model with edge probability p_in inside every group and
+    p_out between groups. sizes is the list of group sizes (see even_sizes).
+    Return (graph or edges, labels) as stochastic_block_model.
+    """
+    probs = np.full((len(sizes), len(sizes)), p_out, dtype=np.float64)
+    np.fill_diagonal(probs, p_in)
+    return stochastic_block_model(sizes, probs, seed, output)
+
+
+def even_sizes(groups, n):
+    """Return the sizes of `groups` groups splitting n nodes as evenly as possible."""
+    return [len(group) for group in np.array_split(np.arange(n), groups)]